@@ -0,0 +1,37 @@
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0b4d7e9f3c21'
+down_revision: Union[str, Sequence[str], None] = 'f2b6c8d1a937'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def _check_case_duplicates(table: str, column: str) -> None:
+    # e-mails que só diferem na caixa/espaços violariam uq_<tabela>_email já
+    # no UPDATE abaixo; precisam ser unificados antes desta migração
+    duplicates = op.get_bind().execute(sa.text(
+        f"SELECT lower(trim({column})) FROM {table} GROUP BY 1 HAVING count(*) > 1 ORDER BY 1"
+    )).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            f"{table}.{column}: e-mails duplicados ignorando caixa e espaços, "
+            f"unifique as contas antes de migrar: {', '.join(duplicates)}"
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _check_case_duplicates('consumers', 'con_email')
+    _check_case_duplicates('seller_users', 'sel_email')
+    # normaliza os e-mails já gravados
+    op.execute("UPDATE consumers SET con_email = lower(trim(con_email)) WHERE con_email <> lower(trim(con_email))")
+    op.execute("UPDATE seller_users SET sel_email = lower(trim(sel_email)) WHERE sel_email <> lower(trim(sel_email))")
+    op.create_index('uq_consumers_email_lower', 'consumers', [sa.text('lower(con_email)')], unique=True)
+    op.create_index('uq_seller_users_email_lower', 'seller_users', [sa.text('lower(sel_email)')], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_seller_users_email_lower', table_name='seller_users')
+    op.drop_index('uq_consumers_email_lower', table_name='consumers')
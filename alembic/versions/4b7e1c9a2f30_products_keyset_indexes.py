@@ -0,0 +1,19 @@
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '4b7e1c9a2f30'
+down_revision: Union[str, Sequence[str], None] = '932d307c60d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_category_name_id', 'products', ['prod_category_id', 'prod_name', 'prod_id'], unique=False)
+    op.create_index('ix_products_name_id', 'products', ['prod_name', 'prod_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_name_id', table_name='products')
+    op.drop_index('ix_products_category_name_id', table_name='products')
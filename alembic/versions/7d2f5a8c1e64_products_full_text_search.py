@@ -0,0 +1,54 @@
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = '7d2f5a8c1e64'
+down_revision: Union[str, Sequence[str], None] = '4b7e1c9a2f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_products_search ON products USING GIN ("
+            "to_tsvector('simple', coalesce(prod_name, '') || ' ' || coalesce(description, '')))"
+        )
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+            "prod_name, description, content='products', content_rowid='prod_id')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+            "INSERT INTO products_fts(rowid, prod_name, description) "
+            "VALUES (new.prod_id, new.prod_name, new.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+            "INSERT INTO products_fts(products_fts, rowid, prod_name, description) "
+            "VALUES ('delete', old.prod_id, old.prod_name, old.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF prod_name, description ON products BEGIN "
+            "INSERT INTO products_fts(products_fts, rowid, prod_name, description) "
+            "VALUES ('delete', old.prod_id, old.prod_name, old.description); "
+            "INSERT INTO products_fts(rowid, prod_name, description) "
+            "VALUES (new.prod_id, new.prod_name, new.description); END"
+        )
+        # indexa os produtos já existentes
+        op.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_products_search")
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS products_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS products_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS products_fts_ai")
+        op.execute("DROP TABLE IF EXISTS products_fts")
@@ -0,0 +1,42 @@
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'a91c3e7b5d02'
+down_revision: Union[str, Sequence[str], None] = '7d2f5a8c1e64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('product_facets',
+    sa.Column('facet', sa.String(length=30), nullable=False),
+    sa.Column('value', sa.String(length=50), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('facet', 'value')
+    )
+    # contagens iniciais; depois são mantidas de forma incremental pela aplicação
+    op.execute(
+        "INSERT INTO product_facets (facet, value, count) "
+        "SELECT 'category', coalesce(prod_category_id, 'None'), count(*) FROM products "
+        "GROUP BY coalesce(prod_category_id, 'None')"
+    )
+    op.execute(
+        "INSERT INTO product_facets (facet, value, count) "
+        "SELECT 'stock', bucket, count(*) FROM ("
+        "SELECT CASE WHEN coalesce(stock, 0) > 0 THEN 'in_stock' ELSE 'out_of_stock' END AS bucket FROM products"
+        ") AS s GROUP BY bucket"
+    )
+    op.execute(
+        "INSERT INTO product_facets (facet, value, count) "
+        "SELECT 'price', bucket, count(*) FROM ("
+        "SELECT CASE WHEN prod_price < 50 THEN '0-50' WHEN prod_price < 100 THEN '50-100' "
+        "WHEN prod_price < 250 THEN '100-250' WHEN prod_price < 500 THEN '250-500' "
+        "WHEN prod_price < 1000 THEN '500-1000' ELSE '1000+' END AS bucket FROM products"
+        ") AS s GROUP BY bucket"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('product_facets')
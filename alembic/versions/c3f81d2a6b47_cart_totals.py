@@ -0,0 +1,26 @@
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'c3f81d2a6b47'
+down_revision: Union[str, Sequence[str], None] = 'a91c3e7b5d02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('carts', sa.Column('item_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('carts', sa.Column('total_amount', sa.Numeric(precision=10, scale=2), server_default='0', nullable=False))
+    # totais iniciais; depois são mantidos de forma incremental pela aplicação
+    op.execute(
+        "UPDATE carts SET "
+        "item_count = (SELECT coalesce(sum(quantity), 0) FROM cart_items WHERE cart_items.car_id = carts.car_id), "
+        "total_amount = (SELECT coalesce(sum(cart_items.quantity * products.prod_price), 0) FROM cart_items "
+        "JOIN products ON products.prod_id = cart_items.product_id WHERE cart_items.car_id = carts.car_id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('carts', 'total_amount')
+    op.drop_column('carts', 'item_count')
@@ -0,0 +1,70 @@
+import argparse
+import asyncio
+import json
+
+from app.session import AsyncSessionLocal, IS_ASYNC, SessionLocal, run_db
+from app.services.idempotency_service import purge_expired_keys
+from app.services.product_import import BATCH_SIZE, ProductImporter
+
+async def _import_products(db, path: str, fmt: str, batch_size: int) -> dict:
+    importer = ProductImporter(fmt)
+    await run_db(db, importer.load_categories)
+
+    # Em bytes, como o corpo de POST /products/bulk: o importador decodifica
+    with open(path, "rb") as source:
+        batch = []
+        for line_no, line in enumerate(source, start=1):
+            batch.append((line_no, line.rstrip(b"\n")))
+            if len(batch) >= batch_size:
+                await run_db(db, importer.import_lines, batch)
+                batch = []
+        if batch:
+            await run_db(db, importer.import_lines, batch)
+
+    await run_db(db, importer.finish)
+    return importer.report()
+
+async def import_products(path: str, fmt: str, batch_size: int = BATCH_SIZE) -> dict:
+    if IS_ASYNC:
+        async with AsyncSessionLocal() as db:
+            return await _import_products(db, path, fmt, batch_size)
+
+    db = SessionLocal()
+    try:
+        return await _import_products(db, path, fmt, batch_size)
+    finally:
+        db.close()
+
+async def purge_idempotency_keys() -> int:
+    if IS_ASYNC:
+        async with AsyncSessionLocal() as db:
+            return await run_db(db, purge_expired_keys)
+
+    db = SessionLocal()
+    try:
+        return await run_db(db, purge_expired_keys)
+    finally:
+        db.close()
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import-products", help="Importa/atualiza produtos a partir de NDJSON ou CSV")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=("ndjson", "csv"))
+    import_parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    commands.add_parser("purge-idempotency-keys", help="Remove Idempotency-Keys expiradas")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "import-products":
+        fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+        report = asyncio.run(import_products(args.path, fmt, args.batch_size))
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    elif args.command == "purge-idempotency-keys":
+        print(json.dumps({"deleted": asyncio.run(purge_idempotency_keys())}))
+
+if __name__ == "__main__":
+    main()
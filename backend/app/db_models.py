@@ -5,16 +5,24 @@ from sqlalchemy import (
     Numeric, 
     UniqueConstraint,
     Enum,
-    Text
+    Text,
+    Index,
+    DateTime,
+    text
 )
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 from app.session import Base
 import enum
+from datetime import datetime
 
 class Consumers(Base):
 
     __tablename__ = "consumers"
-    __table_args__ = (UniqueConstraint("con_email", name="uq_consumers_email"),)
+    __table_args__ = (
+        UniqueConstraint("con_email", name="uq_consumers_email"),
+        # Buscas por e-mail usam lower(con_email): índice de expressão
+        Index("uq_consumers_email_lower", text("lower(con_email)"), unique=True),
+    )
 
     con_id: Mapped[int] = mapped_column(primary_key=True, index=True)
     con_name: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -24,18 +32,33 @@ class Consumers(Base):
     orders: Mapped[list["Order"]] = relationship(back_populates="consumer")
     carts: Mapped[list["Cart"]] = relationship(back_populates="consumer")
 
+    @validates("con_email")
+    def normalize_email(self, key, value):
+        return value.strip().lower()
+
 class SellerUser(Base):
     
     __tablename__ = "seller_users"
-    __table_args__ = (UniqueConstraint("sel_email", name="uq_seller_users_email"),)
+    __table_args__ = (
+        UniqueConstraint("sel_email", name="uq_seller_users_email"),
+        Index("uq_seller_users_email_lower", text("lower(sel_email)"), unique=True),
+    )
 
     sel_id: Mapped[int] = mapped_column(primary_key=True, index=True)
     sel_name: Mapped[str] = mapped_column(String(100), nullable=False)
     sel_email: Mapped[str] = mapped_column(String(255), nullable=False, index=True, unique=True)
     sel_password: Mapped[str] = mapped_column(String(255), nullable=False)
 
+    @validates("sel_email")
+    def normalize_email(self, key, value):
+        return value.strip().lower()
+
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_category_name_id", "prod_category_id", "prod_name", "prod_id"),
+        Index("ix_products_name_id", "prod_name", "prod_id"),
+    )
     
     prod_id: Mapped[int] = mapped_column(primary_key=True, index=True)
     prod_name: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -57,6 +80,13 @@ class Category(Base):
 
     products: Mapped[list["Product"]] = relationship(back_populates="category")
 
+class ProductFacet(Base):
+    __tablename__ = "product_facets"
+
+    facet: Mapped[str] = mapped_column(String(30), primary_key=True)
+    value: Mapped[str] = mapped_column(String(50), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
 class OrderStatus(enum.Enum):
     PENDING = "aguardando_pagamento"
     PAID = "pago"
@@ -71,15 +101,16 @@ class Cart(Base):
 
     car_id: Mapped[int] = mapped_column(primary_key=True, index=True)
     con_id: Mapped[int] = mapped_column(ForeignKey("consumers.con_id"), unique=True, nullable=False)
+    # Totais desnormalizados, mantidos por CartService a cada alteração
+    item_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    total_amount: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False, default=0, server_default="0")
+    # Incrementado a cada alteração; base do ETag de GET /cart/
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     consumer: Mapped["Consumers"] = relationship(back_populates="carts")
     items: Mapped[list["CartItem"]] = relationship(back_populates="cart")
     orders: Mapped[list["Order"]] = relationship(back_populates="cart")
 
-    @property
-    def total_amount(self):
-        return sum(item.subtotal for item in self.items)
-
 class CartItem(Base):
     __tablename__ = "cart_items"
 
@@ -91,6 +122,14 @@ class CartItem(Base):
     cart: Mapped["Cart"] = relationship(back_populates="items")
     product: Mapped["Product"] = relationship(back_populates="cart_items",lazy="joined")
 
+    @property
+    def product_name(self):
+        return self.product.prod_name
+
+    @property
+    def unit_price(self):
+        return self.product.prod_price
+
     @property
     def subtotal(self):
         return self.product.prod_price * self.quantity
@@ -122,4 +161,16 @@ class OrderItem(Base):
     orit_subtotal: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
 
     order: Mapped["Order"] = relationship(back_populates="items")
-    product: Mapped["Product"] = relationship(back_populates="order_items",lazy="joined")
\ No newline at end of file
+    product: Mapped["Product"] = relationship(back_populates="order_items",lazy="joined")
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    con_id: Mapped[int] = mapped_column(ForeignKey("consumers.con_id"), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Nulos enquanto a requisição original ainda está em andamento
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    response_body: Mapped[str | None] = mapped_column(Text, nullable=True)
+    response_headers: Mapped[str | None] = mapped_column(Text, nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
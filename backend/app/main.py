@@ -1,13 +1,26 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.session import Base, engine
-from app.routes import auth, cart, consumer, order, products
+from app.session import Base, engine, async_engine, IS_ASYNC
+from app.routes import admin, auth, cart, consumer, metrics, order, products
+from app.utils.security import shutdown_hash_pool
+from app.utils.instrumentation import RequestMetricsMiddleware
 
-Base.metadata.create_all(bind=engine)
+if not IS_ASYNC:
+    Base.metadata.create_all(bind=engine)
 
 app = FastAPI() 
 
+@app.on_event("startup")
+async def create_tables():
+    if IS_ASYNC:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+@app.on_event("shutdown")
+def stop_hash_pool():
+    shutdown_hash_pool()
+
 origins = [
     "http://127.0.0.1:8000",
     "http://localhost:8000",
@@ -20,10 +33,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestMetricsMiddleware)
 
 app.include_router(auth.router)
 app.include_router(products.router)
 app.include_router(cart.router)
 app.include_router(order.router)
 app.include_router(consumer.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
 
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from pydantic.config import ConfigDict
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 class CartItemCreate(BaseModel):
     product_id: int = Field(..., gt=0, description="ID do produto")
@@ -9,6 +9,22 @@ class CartItemCreate(BaseModel):
 class CartItemUpdate(BaseModel):
     quantity: int = Field(..., gt=0, description="Nova quantidade do produto")
 
+class CartOperation(BaseModel):
+    op: Literal["add", "set", "remove"] = Field(..., description="Operação: add soma, set define e remove retira o item")
+    product_id: int = Field(..., gt=0, description="ID do produto")
+    quantity: Optional[int] = Field(None, ge=0, description="Quantidade (obrigatória para add e set)")
+
+    @model_validator(mode="after")
+    def check_quantity(self):
+        if self.op == "add" and not self.quantity:
+            raise ValueError("add requer quantity maior que zero")
+        if self.op == "set" and self.quantity is None:
+            raise ValueError("set requer quantity")
+        return self
+
+class CartBatchUpdate(BaseModel):
+    operations: List[CartOperation] = Field(..., min_length=1, max_length=200, description="Operações aplicadas em ordem")
+
 class CartItemOut(BaseModel):
     carit_id: int = Field(..., description="ID do item no carrinho")
     product_id: int = Field(..., description="ID do produto")
@@ -25,10 +41,17 @@ class CartBase(BaseModel):
 class CartCreate(CartBase):
     pass
 
-class CartOut(CartBase):
+class CartOut(BaseModel):
     car_id: int = Field(..., description="ID do carrinho")
     con_id: int = Field(..., description="ID do consumidor")
     items: List[CartItemOut] = Field(default_factory=list, description="Itens do carrinho")
+    item_count: int = Field(0, description="Quantidade total de itens")
     total_amount: float = Field(0.0, description="Valor total do carrinho")
+    version: int = Field(0, description="Versão do carrinho")
     
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class CartSummaryOut(BaseModel):
+    item_count: int = Field(0, description="Quantidade total de itens")
+    total_amount: float = Field(0.0, description="Valor total do carrinho")
+    version: int = Field(0, description="Versão do carrinho")
\ No newline at end of file
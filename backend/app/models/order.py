@@ -1,9 +1,8 @@
 from pydantic import BaseModel, Field
 from pydantic.config import ConfigDict
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
-from .product import ProductOut
 from ..db_models import OrderStatus
 
 class OrderItemBase(BaseModel):
@@ -14,13 +13,16 @@ class OrderItemBase(BaseModel):
 class OrderCreate(BaseModel):
 
     items: List[OrderItemBase] = Field(..., min_length=1, description="Lista de itens do pedido")
+    shipping_address: Optional[str] = Field(None, max_length=500, description="Endereço de entrega")
 
 class OrderItemOut(BaseModel):
 
     orit_id: int
-    orit_quantity: int
-    orit_unit_price: float
-    product: ProductOut
+    prod_id: int
+    prod_name: str
+    quantity: int
+    unit_price: float
+    orit_subtotal: float
     model_config = ConfigDict(from_attributes=True)
 
 class OrderOut(BaseModel):
@@ -29,6 +31,7 @@ class OrderOut(BaseModel):
     con_id: int
     car_id: int
     ord_status: OrderStatus
-    ord_total_value: float
+    ord_total_amount: float
+    shipping_address: str
     items: List[OrderItemOut] = []
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from pydantic.config import ConfigDict
-from typing import Optional
+from typing import Dict, List, Optional
 from enum import Enum
 
 from app.db_models import Category
@@ -23,7 +23,35 @@ class ProductCreate(ProductBase):
 
     model_config = ConfigDict(from_attributes=True)
 
-class ProductOut(ProductBase):
+class ProductOut(BaseModel):
+    prod_id: int = Field(..., description="ID do Produto")
+    prod_name: str = Field(..., description="Nome do Produto")
+    description: Optional[str] = Field(None, description="Descrição do Produto")
+    prod_price: float = Field(..., description="Preço do Produto")
+    stock: Optional[int] = Field(None, description="Estoque do Produto")
+    prod_category_id: Optional[str] = Field(None, description="Categoria do Produto")
 
-    prod_category_id: str
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class ProductPage(BaseModel):
+    items: List[ProductOut] = Field(default_factory=list, description="Produtos da página")
+    next_cursor: Optional[str] = Field(None, description="Cursor da próxima página")
+    facets: Optional[Dict[str, Dict[str, int]]] = Field(None, description="Contagens por faceta")
+
+class ProductImportError(BaseModel):
+    line: int
+    error: str
+
+class ProductImportReport(BaseModel):
+    processed: int
+    imported: int
+    failed: int
+    errors: List[ProductImportError]
+
+class ProductDeleted(BaseModel):
+    message: str
+
+class ProductImportRow(ProductBase):
+
+    prod_id: Optional[int] = Field(None, gt=0, description="ID do produto (atualiza se já existir)")
+    stock: int = Field(0, ge=0, description="Estoque do produto")
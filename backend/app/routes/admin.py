@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, status
+
+from app import db_models
+from app.utils.dependencies import get_current_seller_user
+from app.utils.slow_queries import slow_query_log
+
+router = APIRouter(prefix="/admin", tags=["Administração"])
+
+@router.get("/slow-queries")
+def get_slow_queries(
+    current_user: db_models.SellerUser = Depends(get_current_seller_user)
+):
+    return slow_query_log.snapshot()
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+def clear_slow_queries(
+    current_user: db_models.SellerUser = Depends(get_current_seller_user)
+):
+    slow_query_log.clear()
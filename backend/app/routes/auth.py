@@ -3,24 +3,28 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import func
 
-from app.session import get_db
+from app.session import get_db, run_db
 from app import db_models
 from app.models.seller import SellerCreate, SellerOut, SellerLogin
 from app.models.consumer import Token
-from app.utils.security import get_password_hash, verify_password, create_access_token
-from app.services.auth_service import authenticate_seller
+from app.utils.security import get_password_hash, get_password_hash_async, verify_password, create_access_token
+from app.services.auth_service import authenticate_seller, get_seller_by_email
 
 router = APIRouter(prefix="/seller/auth", tags=["Autenticação de Vendedores"])
 
+def _save_seller_user(db: Session, seller_user: db_models.SellerUser) -> db_models.SellerUser:
+    db.add(seller_user)
+    db.commit()
+    db.refresh(seller_user)
+    return seller_user
+
 @router.post("/register", response_model=SellerOut, status_code=status.HTTP_201_CREATED)
-def register_seller_user(payload: SellerCreate, db: Session = Depends(get_db)):
+async def register_seller_user(payload: SellerCreate, db: Session = Depends(get_db)):
    
     email_norm = payload.sel_email.lower().strip()
     name_norm = payload.sel_name.strip()
     
-    exists = db.query(db_models.SellerUser).filter(
-        func.lower(db_models.SellerUser.sel_email) == email_norm
-    ).first()
+    exists = await run_db(db, get_seller_by_email, email_norm)
     
     if exists:
         raise HTTPException(
@@ -30,19 +34,23 @@ def register_seller_user(payload: SellerCreate, db: Session = Depends(get_db)):
     
     new_seller_user = db_models.SellerUser(
         sel_email=email_norm,
-        sel_password=get_password_hash(payload.sel_password),
+        sel_password=await get_password_hash_async(payload.sel_password),
         sel_name=name_norm,
     )
     
-    db.add(new_seller_user)
-    db.commit()
-    db.refresh(new_seller_user)
-    return new_seller_user
+    try:
+        return await run_db(db, _save_seller_user, new_seller_user, out=SellerOut)
+    except IntegrityError:
+        # Cadastro concorrente com o mesmo e-mail (índice único em lower(e-mail))
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Email já está em uso"
+        )
 
 @router.post("/login", response_model=dict)
-def login_for_seller_access_token(payload: SellerLogin, db: Session = Depends(get_db)):
+async def login_for_seller_access_token(payload: SellerLogin, db: Session = Depends(get_db)):
     try:
-        seller_user, access_token = authenticate_seller(db, payload.sel_email, payload.sel_password)
+        seller_user, access_token = await authenticate_seller(db, payload.sel_email, payload.sel_password)
         
         return {
             "access_token": access_token, 
@@ -1,48 +1,136 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from app.session import get_db
+from app.session import get_db, run_db
 from app import db_models
-from app.models.cart import CartItemCreate, CartItemUpdate, CartOut
-from app.utils.dependencies import get_current_user
-from app.services.cart_service import cart_service
+from app.models.cart import CartBatchUpdate, CartItemCreate, CartItemUpdate, CartOut, CartSummaryOut
+from app.utils.dependencies import get_current_consumer
+from app.services.cart_service import cart_etag, cart_service
+from app.services.idempotency_service import request_fingerprint, run_idempotent
+from app.utils.serialization import json_response
 
 router = APIRouter(prefix="/cart", tags=["Carrinho"])
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparação fraca (RFC 9110): ignora o prefixo W/
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+def _cart_headers(cart: CartOut) -> dict:
+    return {"ETag": cart_etag(cart.car_id, cart.version)}
+
+def _set_etag(response: Response, cart: CartOut | Response) -> CartOut | Response:
+    # Respostas repetidas por Idempotency-Key já chegam prontas, com o ETag
+    # armazenado junto da resposta
+    if isinstance(cart, Response):
+        return cart
+    response.headers.update(_cart_headers(cart))
+    return cart
+
 @router.get("/", response_model=CartOut)
-def get_cart(
-    current_user: db_models.Consumers = Depends(get_current_user),
+async def get_cart(
+    if_none_match: Optional[str] = Header(None),
+    current_user: db_models.Consumers = Depends(get_current_consumer),
+    db: Session = Depends(get_db)
+):
+    if if_none_match:
+        summary = await run_db(db, cart_service.get_cart_summary, current_user.con_id)
+        if summary["car_id"] is not None:
+            etag = cart_etag(summary["car_id"], summary["version"])
+            if _etag_matches(if_none_match, etag):
+                return _not_modified(etag)
+
+    cart = await run_db(db, cart_service.get_or_create_cart, current_user.con_id, out=CartOut)
+    return json_response(cart, CartOut, headers={"ETag": cart_etag(cart.car_id, cart.version)})
+
+@router.get("/summary", response_model=CartSummaryOut)
+async def get_cart_summary(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: db_models.Consumers = Depends(get_current_consumer),
     db: Session = Depends(get_db)
 ):
-    return cart_service.get_or_create_cart(db, current_user.con_id)
+    summary = await run_db(db, cart_service.get_cart_summary, current_user.con_id)
+    if summary["car_id"] is None:
+        return summary
+
+    etag = cart_etag(summary["car_id"], summary["version"])
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    response.headers["ETag"] = etag
+    return summary
 
 @router.post("/items", response_model=CartOut)
-def add_to_cart(
+async def add_to_cart(
     item_data: CartItemCreate,
-    current_user: db_models.Consumers = Depends(get_current_user),
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    current_user: db_models.Consumers = Depends(get_current_consumer),
     db: Session = Depends(get_db)
 ):
-    return cart_service.add_item_to_cart(db, current_user.con_id, item_data)
+    cart = await run_idempotent(
+        db, idempotency_key, current_user.con_id, request_fingerprint("POST /cart/items", item_data),
+        cart_service.add_item_to_cart, current_user.con_id, item_data, out=CartOut, headers=_cart_headers
+    )
+    return _set_etag(response, cart)
 
 @router.put("/items/{item_id}", response_model=CartOut)
-def update_cart_item(
+async def update_cart_item(
     item_id: int,
     item_data: CartItemUpdate,
-    current_user: db_models.Consumers = Depends(get_current_user),
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    current_user: db_models.Consumers = Depends(get_current_consumer),
     db: Session = Depends(get_db)
 ):
-    return cart_service.update_cart_item(db, current_user.con_id, item_id, item_data)
+    cart = await run_idempotent(
+        db, idempotency_key, current_user.con_id, request_fingerprint(f"PUT /cart/items/{item_id}", item_data),
+        cart_service.update_cart_item, current_user.con_id, item_id, item_data, out=CartOut, headers=_cart_headers
+    )
+    return _set_etag(response, cart)
 
 @router.delete("/items/{item_id}", response_model=CartOut)
-def remove_from_cart(
+async def remove_from_cart(
     item_id: int,
-    current_user: db_models.Consumers = Depends(get_current_user),
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    current_user: db_models.Consumers = Depends(get_current_consumer),
+    db: Session = Depends(get_db)
+):
+    cart = await run_idempotent(
+        db, idempotency_key, current_user.con_id, request_fingerprint(f"DELETE /cart/items/{item_id}"),
+        cart_service.remove_item_from_cart, current_user.con_id, item_id, out=CartOut, headers=_cart_headers
+    )
+    return _set_etag(response, cart)
+
+@router.patch("/", response_model=CartOut)
+async def update_cart(
+    batch: CartBatchUpdate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    current_user: db_models.Consumers = Depends(get_current_consumer),
     db: Session = Depends(get_db)
 ):
-    return cart_service.remove_item_from_cart(db, current_user.con_id, item_id)
+    cart = await run_idempotent(
+        db, idempotency_key, current_user.con_id, request_fingerprint("PATCH /cart/", batch),
+        cart_service.apply_operations, current_user.con_id, batch, out=CartOut, headers=_cart_headers
+    )
+    return _set_etag(response, cart)
 
 @router.delete("/")
-def clear_cart(
-    current_user: db_models.Consumers = Depends(get_current_user),
+async def clear_cart(
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    current_user: db_models.Consumers = Depends(get_current_consumer),
     db: Session = Depends(get_db)
 ):
-    return cart_service.clear_cart(db, current_user.con_id)
\ No newline at end of file
+    return await run_idempotent(
+        db, idempotency_key, current_user.con_id, request_fingerprint("DELETE /cart/"),
+        cart_service.clear_cart, current_user.con_id
+    )
\ No newline at end of file
@@ -4,24 +4,28 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 from typing import List
-from app.session import get_db
+from app.session import get_db, run_db
 from app import db_models
 from app.models.consumer import ConsumerCreate, ConsumerOut, ConsumerLogin, Token
-from app.utils.security import get_password_hash, verify_password, create_access_token
-from app.services.consumer_auth import authenticate_consumer
+from app.utils.security import get_password_hash, get_password_hash_async, verify_password, create_access_token
+from app.services.consumer_auth import authenticate_consumer, get_consumer_by_email
 
 router = APIRouter(prefix="/auth", tags=["Autenticação de Consumidores"])
 
+def _save_consumer(db: Session, consumer: db_models.Consumers) -> db_models.Consumers:
+    db.add(consumer)
+    db.commit()
+    db.refresh(consumer)
+    return consumer
+
 @router.post("/register", response_model=ConsumerOut, status_code=status.HTTP_201_CREATED)
-def register_consumer(payload: ConsumerCreate, db: Session = Depends(get_db)):
+async def register_consumer(payload: ConsumerCreate, db: Session = Depends(get_db)):
   
     name_norm = payload.con_name.strip()
     email_norm = payload.con_email.lower().strip()
 
     
-    exists = db.query(db_models.Consumers).filter(
-        func.lower(db_models.Consumers.con_email) == email_norm
-    ).first()
+    exists = await run_db(db, get_consumer_by_email, email_norm)
 
     if exists:
         raise HTTPException(
@@ -32,19 +36,23 @@ def register_consumer(payload: ConsumerCreate, db: Session = Depends(get_db)):
     new_consumer = db_models.Consumers(
         con_name=name_norm,
         con_email=email_norm,
-        con_password=get_password_hash(payload.con_password)
+        con_password=await get_password_hash_async(payload.con_password)
     )
     
-    db.add(new_consumer)
-    db.commit()
-    db.refresh(new_consumer)
-    return new_consumer
+    try:
+        return await run_db(db, _save_consumer, new_consumer, out=ConsumerOut)
+    except IntegrityError:
+        # Cadastro concorrente com o mesmo e-mail (índice único em lower(e-mail))
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Um consumidor com este e-mail já existe."
+        )
 
 @router.post("/login", response_model=dict)
-def login_for_consumer_access_token(payload: ConsumerLogin, db: Session = Depends(get_db)):
+async def login_for_consumer_access_token(payload: ConsumerLogin, db: Session = Depends(get_db)):
     try:
         
-        consumer, access_token = authenticate_consumer(db, payload.con_email, payload.con_password)
+        consumer, access_token = await authenticate_consumer(db, payload.con_email, payload.con_password)
         
         return {
             "access_token": access_token, 
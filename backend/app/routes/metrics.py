@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.session import engine
+from app.utils.metrics import pool_metrics, render_prometheus
+from app.utils.security import token_cache
+from app.utils.cache_backend import get_cache
+
+router = APIRouter(tags=["Métricas"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_prometheus_metrics():
+    return PlainTextResponse(render_prometheus(engine.pool), media_type="text/plain; version=0.0.4")
+
+@router.get("/metrics/pool")
+def get_pool_metrics():
+    return pool_metrics.snapshot(engine.pool)
+
+@router.get("/metrics/token-cache")
+def get_token_cache_metrics():
+    return token_cache.stats()
+
+@router.get("/metrics/cache")
+def get_cache_metrics():
+    return get_cache().stats()
@@ -1,22 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional
 from datetime import datetime
 
-from app.session import get_db
+from app.session import after_commit, get_db, run_db
 from app import db_models
 from app.models.order import OrderCreate, OrderOut
-from app.utils.dependencies import get_current_user
+from app.utils.dependencies import get_current_consumer, get_current_seller_user
+from app.services.stock_service import reserve_stock
+from app.services.cart_service import reset_cart_totals
+from app.services.product_service import invalidate_products
+from app.services import facet_service, order_service
+from app.services.idempotency_service import request_fingerprint, run_idempotent
+from app.utils.serialization import json_response
 
 router = APIRouter(prefix="/orders", tags=["Pedidos"])
 
-@router.post("/checkout", response_model=OrderOut, status_code=status.HTTP_201_CREATED)
-def checkout(
-    checkout_data: OrderCreate,
-    current_user: db_models.Consumers = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):    
-    cart = db.query(db_models.Cart).filter(db_models.Cart.con_id == current_user.con_id).first()
+def _checkout(db: Session, consumer_id: int, checkout_data: OrderCreate) -> db_models.Order:
+    # FOR UPDATE: itens adicionados durante o checkout não são apagados sem
+    # entrar no pedido (ver CartService._load_cart)
+    cart = db.query(db_models.Cart).options(
+        selectinload(db_models.Cart.items)
+    ).filter(db_models.Cart.con_id == consumer_id).with_for_update(of=db_models.Cart).first()
     
     if not cart or not cart.items:
         raise HTTPException(
@@ -24,78 +31,121 @@ def checkout(
             detail="Carrinho vazio"
         )
     
-    total_amount = 0.0
-    
-    for cart_item in cart.items:
-        product = cart_item.product
-        
-        if product.stock < cart_item.quantity:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Estoque insuficiente para {product.prod_name}"
-            )
-        
-        product.stock -= cart_item.quantity
-        subtotal = float(product.prod_price) * cart_item.quantity
-        total_amount += subtotal
+    lines = [(item.product_id, item.quantity) for item in cart.items]
+    failed = reserve_stock(db, lines)
+    if failed:
+        names = [item.product.prod_name for item in cart.items if item.product_id in failed]
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Estoque insuficiente para {', '.join(names)}"
+        )
+
+    facet_service.stock_decreased(db, (product_id for product_id, _ in lines))
+
+    # Total a partir dos mesmos preços gravados nos itens do pedido; os
+    # totais desnormalizados do carrinho servem só às respostas do carrinho.
+    order_items = [
+        {
+            "prod_id": item.product_id,
+            "prod_name": item.product.prod_name,
+            "unit_price": float(item.product.prod_price),
+            "quantity": item.quantity,
+            "orit_subtotal": float(item.product.prod_price) * item.quantity,
+        }
+        for item in cart.items
+    ]
+    total_amount = sum(item["orit_subtotal"] for item in order_items)
 
     order = db_models.Order(
-        con_id=current_user.con_id,
+        con_id=consumer_id,
+        car_id=cart.car_id,
         ord_total_amount=total_amount,
-        ord_status=db_models.OrderStatus.PENDING
+        ord_status=db_models.OrderStatus.PENDING,
+        shipping_address=checkout_data.shipping_address or ""
     )
     db.add(order)
+    db.flush()
+
+    db.execute(insert(db_models.OrderItem), [{"ord_id": order.ord_id, **item} for item in order_items])
+    db.execute(delete(db_models.CartItem).where(db_models.CartItem.car_id == cart.car_id))
+    reset_cart_totals(db, cart.car_id)
     db.commit()
-    db.refresh(order)
+    after_commit(db, invalidate_products, *(product_id for product_id, _ in lines))
+
+    return order
+
+def _list_orders(db: Session, consumer_id: int, skip: int, limit: int) -> List[db_models.Order]:
+    return db.query(db_models.Order).options(
+        order_service.ORDER_ITEMS_LOADER
+    ).filter(
+        db_models.Order.con_id == consumer_id
+    ).order_by(db_models.Order.ord_id.desc()).offset(skip).limit(limit).all()
+
+def _get_order(db: Session, consumer_id: int, order_id: int) -> db_models.Order:
+    order = db.query(db_models.Order).options(
+        order_service.ORDER_ITEMS_LOADER
+    ).filter(
+        db_models.Order.ord_id == order_id,
+        db_models.Order.con_id == consumer_id
+    ).first()
     
-    for cart_item in cart.items:
-        product = cart_item.product
-        subtotal = float(product.prod_price) * cart_item.quantity
-        
-        order_item = db_models.OrderItem(
-            ord_id=order.ord_id,
-            prod_id=product.prod_id,
-            prod_name=product.prod_name,
-            unit_price=float(product.prod_price),
-            quantity=cart_item.quantity,
-            orit_subtotal=subtotal
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pedido não encontrado"
         )
-        db.add(order_item)
-    
-    db.query(db_models.CartItem).filter(db_models.CartItem.cart_id == cart.car_id).delete()
-    db.commit()
-    db.refresh(order)
     
     return order
 
+@router.post("/checkout", response_model=OrderOut, status_code=status.HTTP_201_CREATED)
+async def checkout(
+    checkout_data: OrderCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    current_user: db_models.Consumers = Depends(get_current_consumer),
+    db: Session = Depends(get_db)
+):
+    return await run_idempotent(
+        db, idempotency_key, current_user.con_id,
+        request_fingerprint("POST /orders/checkout", checkout_data),
+        _checkout, current_user.con_id, checkout_data,
+        out=OrderOut, status_code=status.HTTP_201_CREATED
+    )
+
 @router.get("/", response_model=List[OrderOut])
-def get_user_orders(
-    current_user: db_models.Consumers = Depends(get_current_user),
+async def get_user_orders(
+    current_user: db_models.Consumers = Depends(get_current_consumer),
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 10
 ):
-    orders = db.query(db_models.Order).filter(
-        db_models.Order.con_id == current_user.con_id
-    ).order_by(db_models.Order.ord_id.desc()).offset(skip).limit(limit).all()
-    
-    return orders
+    orders = await run_db(db, _list_orders, current_user.con_id, skip, limit, out=List[OrderOut])
+    return json_response(orders, List[OrderOut])
+
+@router.get("/history/export")
+def export_order_history(
+    current_user: db_models.Consumers = Depends(get_current_consumer)
+):
+    return StreamingResponse(
+        order_service.stream_customer_order_history(current_user.con_id),
+        media_type="application/x-ndjson"
+    )
+
+@router.get("/status/{order_status}/export")
+def export_orders_by_status(
+    order_status: db_models.OrderStatus,
+    current_user: db_models.SellerUser = Depends(get_current_seller_user)
+):
+    return StreamingResponse(
+        order_service.stream_orders_by_status(order_status),
+        media_type="application/x-ndjson"
+    )
 
 @router.get("/{order_id}", response_model=OrderOut)
-def get_order(
+async def get_order(
     order_id: int,
-    current_user: db_models.Consumers = Depends(get_current_user),
+    current_user: db_models.Consumers = Depends(get_current_consumer),
     db: Session = Depends(get_db)
 ):
-    order = db.query(db_models.Order).filter(
-        db_models.Order.ord_id == order_id,
-        db_models.Order.con_id == current_user.con_id
-    ).first()
-    
-    if not order:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Pedido não encontrado"
-        )
-    
-    return order
\ No newline at end of file
+    order = await run_db(db, _get_order, current_user.con_id, order_id, out=OrderOut)
+    return json_response(order, OrderOut)
@@ -1,46 +1,126 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Union
 
-from app.session import get_db
-from app.models.product import ProductCreate, ProductOut
+from app.session import get_db, run_db
+from app.models.product import ProductCreate, ProductDeleted, ProductImportReport, ProductOut, ProductPage
 from app.db_models import Category
 from app.services.product_service import create_new_product, list_products
-from app.services import product_service
+from app.services import facet_service, product_service, search_service
+from app.services.product_import import BATCH_SIZE, ProductImporter, aiter_lines
+from app.services import product_export
+from app.utils.serialization import json_response
 
 router = APIRouter()
 
-@router.post("/products/")
-def create_product(product: ProductCreate, db: Session = Depends(get_db)):
+@router.post("/products/", response_model=ProductOut)
+async def create_product(product: ProductCreate, db: Session = Depends(get_db)):
     try:
-        return product_service.create_new_product(db, product)
+        created = await run_db(db, product_service.create_new_product, product, out=ProductOut)
+        return json_response(created, ProductOut)
     except ValueError as e:
         if str(e) == "category-not-found":
             raise HTTPException(status_code=404, detail="Category not found")
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/products/{product_id}")
-def get_product(product_id: int, db: Session = Depends(get_db)):
+@router.post("/products/bulk", response_model=ProductImportReport)
+async def bulk_import_products(
+    request: Request,
+    format: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    try:
+        importer = ProductImporter(format)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Format must be ndjson or csv")
+
+    await run_db(db, importer.load_categories)
+
+    batch = []
+    async for line in aiter_lines(request.stream()):
+        batch.append(line)
+        if len(batch) >= BATCH_SIZE:
+            await run_db(db, importer.import_lines, batch)
+            batch = []
+    if batch:
+        await run_db(db, importer.import_lines, batch)
+
+    await run_db(db, importer.finish)
+    return json_response(importer.report(), ProductImportReport)
+
+@router.get("/products/export", response_class=StreamingResponse)
+def export_products(format: str = "ndjson"):
+    try:
+        rows = product_export.iter_export(format)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Format must be ndjson or csv")
+
+    return StreamingResponse(
+        rows,
+        media_type=product_export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'},
+    )
+
+@router.get("/products/search", response_model=List[ProductOut])
+async def search_products(
+    q: str,
+    page: int = 1,
+    size: int = 20,
+    db: Session = Depends(get_db)
+):
     try:
-        return product_service.get_product_item(db, product_id)
+        rows = await run_db(db, search_service.search_products, q, page, size)
+        return json_response(rows, List[ProductOut])
+    except ValueError as e:
+        if str(e) == "empty-query":
+            raise HTTPException(status_code=400, detail="Search query is empty")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/products/{product_id}", response_model=ProductOut)
+async def get_product(product_id: int, db: Session = Depends(get_db)):
+    try:
+        record = await product_service.get_product_record(db, product_id)
+        return json_response(record, ProductOut)
     except ValueError as e:
         if str(e) == "product-not-found":
             raise HTTPException(status_code=404, detail="Product not found")
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/products/")
-def list_products(
+@router.get("/products/", response_model=Union[List[ProductOut], ProductPage])
+async def list_products(
     category: Optional[int] = None,
     page: int = 1,
     size: int = 50,
+    cursor: bool = False,
+    after: Optional[str] = None,
+    facets: bool = False,
     db: Session = Depends(get_db)
 ):
-    return product_service.list_products(db, category, page, size)
+    if not cursor and after is None:
+        result = await run_db(db, product_service.list_products, category, page, size)
+        if facets:
+            result = {"items": result}
+    else:
+        try:
+            result = await run_db(db, product_service.list_products_after, category, after, size)
+        except ValueError as e:
+            if str(e) == "invalid-cursor":
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            raise HTTPException(status_code=400, detail=str(e))
+
+    if facets:
+        result["facets"] = await run_db(db, facet_service.get_facets)
+    if isinstance(result, dict):
+        return json_response(result, ProductPage)
+    return json_response(result, List[ProductOut])
 
-@router.delete("/products/{product_id}")
-def delete_product(product_id: int, db: Session = Depends(get_db)):
+@router.delete("/products/{product_id}", response_model=ProductDeleted)
+async def delete_product(product_id: int, db: Session = Depends(get_db)):
     try:
-        product_service.delete_product(db, product_id)
+        await run_db(db, product_service.delete_product, product_id)
         return {"message": "Product deleted successfully"}
     except ValueError as e:
         if str(e) == "product-not-found":
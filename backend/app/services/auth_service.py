@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app import db_models
-from app.utils.security import verify_password, create_access_token
+from app.session import run_db
+from app.utils.security import verify_password, verify_password_async, create_access_token
 
 # def authenticate_seller(db: Session, email: str, password: str) -> str:
 
@@ -16,15 +17,18 @@ from app.utils.security import verify_password, create_access_token
 #     access_token = create_access_token(subject=token_data)
 #     return access_token
 
-def authenticate_seller(db: Session, email: str, password: str) -> tuple[db_models.SellerUser, str]:
-    seller_user = db.query(db_models.SellerUser).filter(
-        func.lower(db_models.SellerUser.sel_email) == email.lower()
+def get_seller_by_email(db: Session, email: str) -> db_models.SellerUser | None:
+    return db.query(db_models.SellerUser).filter(
+        func.lower(db_models.SellerUser.sel_email) == email.strip().lower()
     ).first()
 
+async def authenticate_seller(db: Session, email: str, password: str) -> tuple[db_models.SellerUser, str]:
+    seller_user = await run_db(db, get_seller_by_email, email)
+
     if not seller_user:
         raise ValueError("invalid-credentials")
 
-    if not verify_password(password, seller_user.sel_password):
+    if not await verify_password_async(password, seller_user.sel_password):
         raise ValueError("invalid-credentials")
 
     token_data = {
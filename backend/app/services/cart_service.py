@@ -1,21 +1,99 @@
-from sqlalchemy.orm import Session
+from typing import Iterable
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session, selectinload
 from fastapi import HTTPException
 from app import db_models
-from app.models.cart import CartItemCreate, CartItemUpdate
+from app.models.cart import CartBatchUpdate, CartItemCreate, CartItemUpdate
+
+Cart = db_models.Cart
+CartItem = db_models.CartItem
+Product = db_models.Product
+
+def _adjust_totals(db: Session, car_id: int, quantity: int, amount) -> None:
+    # Incremento no próprio UPDATE. As mutações travam a linha do carrinho
+    # antes de ler os itens (_load_cart(lock=True)), então o delta calculado
+    # a partir das quantidades lidas não se perde entre requisições
+    # concorrentes e os totais acompanham os itens.
+    db.execute(
+        update(Cart)
+        .where(Cart.car_id == car_id)
+        .values(
+            item_count=Cart.item_count + quantity,
+            total_amount=Cart.total_amount + amount,
+            version=Cart.version + 1,
+        )
+    )
+
+def reset_cart_totals(db: Session, car_id: int) -> None:
+    db.execute(update(Cart).where(Cart.car_id == car_id).values(item_count=0, total_amount=0, version=Cart.version + 1))
+
+def reconcile_cart_totals(db: Session, product_ids: Iterable[int] | None = None) -> None:
+    # Recalcula os totais a partir dos itens. Com product_ids, só os carrinhos
+    # que contêm algum desses produtos (ex.: após mudança de preço).
+    item_count = select(func.coalesce(func.sum(CartItem.quantity), 0)).where(
+        CartItem.car_id == Cart.car_id
+    ).scalar_subquery()
+    total_amount = select(func.coalesce(func.sum(CartItem.quantity * Product.prod_price), 0)).join(
+        Product, Product.prod_id == CartItem.product_id
+    ).where(CartItem.car_id == Cart.car_id).scalar_subquery()
+
+    stmt = update(Cart).values(item_count=item_count, total_amount=total_amount, version=Cart.version + 1)
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        stmt = stmt.where(Cart.car_id.in_(
+            select(CartItem.car_id).where(CartItem.product_id.in_(product_ids))
+        ))
+    db.execute(stmt, execution_options={"synchronize_session": False})
+
+def cart_etag(car_id: int, version: int) -> str:
+    return f'W/"{car_id}-{version}"'
 
 class CartService:
-    
-    def get_or_create_cart(self, db: Session, consumer_id: int) -> db_models.Cart:
-        cart = db.query(db_models.Cart).filter(db_models.Cart.con_id == consumer_id).first()
+
+    def get_cart_summary(self, db: Session, consumer_id: int) -> dict:
+        # Uma única leitura pelo índice único de con_id, sem itens nem produtos
+        row = db.execute(
+            select(Cart.car_id, Cart.item_count, Cart.total_amount, Cart.version)
+            .where(Cart.con_id == consumer_id)
+        ).first()
+        if row is None:
+            return {"car_id": None, "item_count": 0, "total_amount": 0.0, "version": 0}
+        return row._asdict()
+
+    def _load_cart(self, db: Session, consumer_id: int, lock: bool = False) -> db_models.Cart | None:
+        # Itens em um único SELECT ... IN (com o produto via joined load de
+        # CartItem.product); populate_existing recarrega o carrinho já
+        # presente na sessão após um commit. Com lock, SELECT ... FOR UPDATE
+        # na linha do carrinho serializa as mutações até o commit (no SQLite
+        # a escrita já é serializada pelo próprio banco).
+        query = db.query(db_models.Cart).options(
+            selectinload(db_models.Cart.items)
+        ).filter(
+            db_models.Cart.con_id == consumer_id
+        ).populate_existing()
+        if lock:
+            query = query.with_for_update(of=db_models.Cart)
+        return query.first()
+
+    def get_or_create_cart(self, db: Session, consumer_id: int, lock: bool = False) -> db_models.Cart:
+        cart = self._load_cart(db, consumer_id, lock)
         
         if not cart:
-            cart = db_models.Cart(con_id=consumer_id)
+            cart = db_models.Cart(con_id=consumer_id, items=[])
             db.add(cart)
             db.commit()
-            db.refresh(cart)
+            cart = self._load_cart(db, consumer_id, lock)
         
         return cart
 
+    def _find_item(self, cart: db_models.Cart, item_id: int) -> db_models.CartItem:
+        for cart_item in cart.items:
+            if cart_item.carit_id == item_id:
+                return cart_item
+        raise HTTPException(status_code=404, detail="Item não encontrado")
+
     def add_item_to_cart(self, db: Session, consumer_id: int, item_data: CartItemCreate) -> db_models.Cart:
         product = db.query(db_models.Product).filter(
             db_models.Product.prod_id == item_data.product_id
@@ -27,68 +105,116 @@ class CartService:
         if product.stock < item_data.quantity:
             raise HTTPException(status_code=400, detail="Estoque insuficiente")
         
-        cart = self.get_or_create_cart(db, consumer_id)
+        cart = self.get_or_create_cart(db, consumer_id, lock=True)
         
-        existing_item = db.query(db_models.CartItem).filter(
-            db_models.CartItem.cart_id == cart.car_id,
-            db_models.CartItem.product_id == item_data.product_id
-        ).first()
+        existing_item = next(
+            (item for item in cart.items if item.product_id == item_data.product_id), None
+        )
         
         if existing_item:
-            existing_item.quantity += item_data.quantity
-            if product.stock < existing_item.quantity:
+            if product.stock < existing_item.quantity + item_data.quantity:
                 raise HTTPException(status_code=400, detail="Estoque insuficiente")
+            existing_item.quantity += item_data.quantity
         else:
             new_item = db_models.CartItem(
-                cart_id=cart.car_id,
                 product_id=item_data.product_id,
-                quantity=item_data.quantity
+                quantity=item_data.quantity,
+                product=product
             )
-            db.add(new_item)
+            cart.items.append(new_item)
         
+        _adjust_totals(db, cart.car_id, item_data.quantity, product.prod_price * item_data.quantity)
         db.commit()
-        db.refresh(cart)
-        return cart
+        return self._load_cart(db, consumer_id)
 
     def update_cart_item(self, db: Session, consumer_id: int, item_id: int, item_data: CartItemUpdate) -> db_models.Cart:
-        cart = self.get_or_create_cart(db, consumer_id)
+        cart = self.get_or_create_cart(db, consumer_id, lock=True)
         
-        cart_item = db.query(db_models.CartItem).filter(
-            db_models.CartItem.carit_id == item_id,
-            db_models.CartItem.cart_id == cart.car_id
-        ).first()
-        
-        if not cart_item:
-            raise HTTPException(status_code=404, detail="Item não encontrado")
+        cart_item = self._find_item(cart, item_id)
         
         if cart_item.product.stock < item_data.quantity:
             raise HTTPException(status_code=400, detail="Estoque insuficiente")
         
+        delta = item_data.quantity - cart_item.quantity
         cart_item.quantity = item_data.quantity
+        _adjust_totals(db, cart.car_id, delta, cart_item.product.prod_price * delta)
         db.commit()
-        db.refresh(cart)
-        return cart
+        return self._load_cart(db, consumer_id)
 
     def remove_item_from_cart(self, db: Session, consumer_id: int, item_id: int) -> db_models.Cart:
-        cart = self.get_or_create_cart(db, consumer_id)
+        cart = self.get_or_create_cart(db, consumer_id, lock=True)
         
-        cart_item = db.query(db_models.CartItem).filter(
-            db_models.CartItem.carit_id == item_id,
-            db_models.CartItem.cart_id == cart.car_id
-        ).first()
-        
-        if not cart_item:
-            raise HTTPException(status_code=404, detail="Item não encontrado")
+        cart_item = self._find_item(cart, item_id)
         
         db.delete(cart_item)
+        _adjust_totals(db, cart.car_id, -cart_item.quantity, -cart_item.subtotal)
         db.commit()
-        db.refresh(cart)
-        return cart
+        return self._load_cart(db, consumer_id)
+
+    def apply_operations(self, db: Session, consumer_id: int, batch: CartBatchUpdate) -> db_models.Cart:
+        cart = self.get_or_create_cart(db, consumer_id, lock=True)
+        items = {item.product_id: item for item in cart.items}
+
+        product_ids = {operation.product_id for operation in batch.operations}
+        products = {
+            product.prod_id: product
+            for product in db.query(db_models.Product).filter(db_models.Product.prod_id.in_(product_ids))
+        }
+
+        # Aplica as operações em memória; o banco só vê o estado final
+        quantities = {product_id: item.quantity for product_id, item in items.items()}
+        for operation in batch.operations:
+            if operation.op == "remove":
+                quantities.pop(operation.product_id, None)
+                continue
+            if operation.product_id not in products:
+                raise HTTPException(status_code=404, detail=f"Produto {operation.product_id} não encontrado")
+            if operation.op == "add":
+                quantities[operation.product_id] = quantities.get(operation.product_id, 0) + operation.quantity
+            elif operation.quantity:
+                quantities[operation.product_id] = operation.quantity
+            else:
+                quantities.pop(operation.product_id, None)
+
+        # Só os produtos citados no lote: itens que o lote não toca ficam como estão
+        for product_id in product_ids & quantities.keys():
+            quantity = quantities[product_id]
+            if products[product_id].stock < quantity:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Estoque insuficiente para {products[product_id].prod_name}"
+                )
+
+        count_delta, amount_delta, new_items = 0, 0, []
+        for product_id in items.keys() | quantities.keys():
+            item = items.get(product_id)
+            old = item.quantity if item else 0
+            new = quantities.get(product_id, 0)
+            if new == old:
+                continue
+
+            if item is None:
+                new_items.append({"car_id": cart.car_id, "product_id": product_id, "quantity": new})
+            elif new == 0:
+                db.delete(item)
+            else:
+                item.quantity = new
+            count_delta += new - old
+            amount_delta += (item.product if item else products[product_id]).prod_price * (new - old)
+
+        # Itens novos num único executemany; o carrinho é recarregado abaixo
+        if new_items:
+            db.execute(insert(CartItem), new_items)
+        if count_delta or amount_delta:
+            _adjust_totals(db, cart.car_id, count_delta, amount_delta)
+        db.commit()
+        return self._load_cart(db, consumer_id)
 
     def clear_cart(self, db: Session, consumer_id: int) -> dict:
-        cart = self.get_or_create_cart(db, consumer_id)
+        cart = self.get_or_create_cart(db, consumer_id, lock=True)
         
-        db.query(db_models.CartItem).filter(db_models.CartItem.cart_id == cart.car_id).delete()
+        db.query(db_models.CartItem).filter(db_models.CartItem.car_id == cart.car_id).delete()
+        reset_cart_totals(db, cart.car_id)
         db.commit()
         
         return {"message": "Carrinho limpo"}
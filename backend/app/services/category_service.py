@@ -1,5 +1,39 @@
+import os
 from sqlalchemy.orm import Session
-from db_models import Category
+from app.db_models import Category
+from app.utils.cache_backend import get_cache
+
+CATEGORY_CACHE_TTL = float(os.environ.get("CATEGORY_CACHE_TTL", 300))
+CATEGORIES_KEY = "categories:all"
+
+def _serialize_category(category: Category) -> dict:
+    return {"id": category.id, "name": category.name, "description": category.description}
+
+def invalidate_categories() -> None:
+    get_cache().delete(CATEGORIES_KEY)
+
+def list_categories(db: Session) -> list[dict]:
+    cache = get_cache()
+    categories = cache.get(CATEGORIES_KEY)
+    if categories is None:
+        categories = [
+            _serialize_category(category)
+            for category in db.query(Category).order_by(Category.name)
+        ]
+        cache.set(CATEGORIES_KEY, categories, ttl=CATEGORY_CACHE_TTL)
+    return categories
+
+def get_category_by_name(db: Session, name: str) -> dict | None:
+    for category in list_categories(db):
+        if category["name"] == name:
+            return category
+
+    # A lista em cache pode estar defasada: confirma no banco antes de negar
+    category = db.query(Category).filter(Category.name == name).first()
+    if category is None:
+        return None
+    invalidate_categories()
+    return _serialize_category(category)
 
 def get_or_create_categories(db: Session):
     categories_data = [
@@ -7,11 +41,12 @@ def get_or_create_categories(db: Session):
         {"name": "CATEGORY_B", "description": "Categoria B"},
         {"name": "CATEGORY_C", "description": "Categoria C"},
     ]
-    
+
     for cat_data in categories_data:
         existing = db.query(Category).filter(Category.name == cat_data["name"]).first()
         if not existing:
             category = Category(**cat_data)
             db.add(category)
-    
-    db.commit()
\ No newline at end of file
+
+    db.commit()
+    invalidate_categories()
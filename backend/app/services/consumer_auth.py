@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app import db_models
-from app.utils.security import verify_password, create_access_token
+from app.session import run_db
+from app.utils.security import verify_password, verify_password_async, create_access_token
 
 # def authenticate_consumer(db: Session, email: str, password: str) -> 
 
@@ -16,12 +17,15 @@ from app.utils.security import verify_password, create_access_token
 #     access_token = create_access_token(subject=token_data)
 #     return access_token
 
-def authenticate_consumer(db: Session, email: str, password: str) -> tuple[db_models.Consumers, str]:
-    consumer = db.query(db_models.Consumers).filter(
-        func.lower(db_models.Consumers.con_email) == email.lower()
+def get_consumer_by_email(db: Session, email: str) -> db_models.Consumers | None:
+    return db.query(db_models.Consumers).filter(
+        func.lower(db_models.Consumers.con_email) == email.strip().lower()
     ).first()
 
-    if not consumer or not verify_password(password, consumer.con_password):
+async def authenticate_consumer(db: Session, email: str, password: str) -> tuple[db_models.Consumers, str]:
+    consumer = await run_db(db, get_consumer_by_email, email)
+
+    if not consumer or not await verify_password_async(password, consumer.con_password):
         raise ValueError("invalid-credentials")
 
     token_data = {
@@ -0,0 +1,130 @@
+from typing import Iterable
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app import db_models
+from app.utils.sql import upsert_insert
+
+Facet = db_models.ProductFacet
+Product = db_models.Product
+
+# Limites superiores (exclusivos) das faixas de preço
+PRICE_BUCKETS = (50, 100, 250, 500, 1000)
+
+def price_bucket(price) -> str:
+    lower = 0
+    for upper in PRICE_BUCKETS:
+        if float(price) < upper:
+            return f"{lower}-{upper}"
+        lower = upper
+    return f"{lower}+"
+
+def stock_bucket(stock) -> str:
+    return "in_stock" if (stock or 0) > 0 else "out_of_stock"
+
+def _facet_values(category_id, price, stock) -> list[tuple[str, str]]:
+    return [
+        ("category", str(category_id)),
+        ("price", price_bucket(price)),
+        ("stock", stock_bucket(stock)),
+    ]
+
+def product_facets(product: db_models.Product) -> list[tuple[str, str]]:
+    return _facet_values(product.prod_category_id, product.prod_price, product.stock)
+
+def apply_deltas(db: Session, deltas: dict[tuple[str, str], int]) -> None:
+    rows = [
+        {"facet": facet, "value": value, "count": delta}
+        for (facet, value), delta in deltas.items() if delta
+    ]
+    if not rows:
+        return
+
+    stmt = upsert_insert(db, Facet)
+    if stmt is not None:
+        stmt = stmt.values(rows)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[Facet.facet, Facet.value],
+            set_={"count": Facet.count + stmt.excluded.count},
+        ))
+        return
+
+    for row in rows:
+        result = db.execute(
+            update(Facet)
+            .where(Facet.facet == row["facet"], Facet.value == row["value"])
+            .values(count=Facet.count + row["count"])
+        )
+        if result.rowcount == 0:
+            db.add(Facet(**row))
+
+def _diff(old: Iterable[tuple[str, str]], new: Iterable[tuple[str, str]]) -> dict[tuple[str, str], int]:
+    deltas: dict[tuple[str, str], int] = {}
+    for key in old:
+        deltas[key] = deltas.get(key, 0) - 1
+    for key in new:
+        deltas[key] = deltas.get(key, 0) + 1
+    return deltas
+
+def product_added(db: Session, product: db_models.Product) -> None:
+    apply_deltas(db, _diff([], product_facets(product)))
+
+def product_removed(db: Session, product: db_models.Product) -> None:
+    apply_deltas(db, _diff(product_facets(product), []))
+
+def product_changed(db: Session, old: list[tuple[str, str]], product: db_models.Product) -> None:
+    apply_deltas(db, _diff(old, product_facets(product)))
+
+def row_facets(row: dict) -> list[tuple[str, str]]:
+    return _facet_values(row["prod_category_id"], row["prod_price"], row["stock"])
+
+def facets_replaced(db: Session, old: Iterable[tuple[str, str]], new: Iterable[tuple[str, str]]) -> None:
+    # Escrita em lote (import): faixas de todos os produtos sobrescritos e
+    # de todos os gravados, aplicadas num único upsert
+    apply_deltas(db, _diff(old, new))
+
+def stock_decreased(db: Session, product_ids: Iterable[int]) -> None:
+    # Após uma reserva bem-sucedida o estoque anterior era > 0, então todo
+    # produto que chegou a zero acabou de mudar de faixa.
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+    sold_out = db.execute(
+        select(func.count()).select_from(Product)
+        .where(Product.prod_id.in_(product_ids), Product.stock <= 0)
+    ).scalar_one()
+    apply_deltas(db, {
+        ("stock", "in_stock"): -sold_out,
+        ("stock", "out_of_stock"): sold_out,
+    })
+
+def _price_bucket_expression():
+    whens, lower = [], 0
+    for upper in PRICE_BUCKETS:
+        whens.append((Product.prod_price < upper, f"{lower}-{upper}"))
+        lower = upper
+    return case(*whens, else_=f"{lower}+")
+
+def rebuild_facets(db: Session) -> None:
+    stock = case((func.coalesce(Product.stock, 0) > 0, "in_stock"), else_="out_of_stock")
+    groups = [
+        ("category", func.coalesce(Product.prod_category_id, "None")),
+        ("price", _price_bucket_expression()),
+        ("stock", stock),
+    ]
+
+    db.execute(delete(Facet))
+    for facet, expression in groups:
+        for value, count in db.execute(
+            select(expression, func.count()).select_from(Product).group_by(expression)
+        ):
+            db.add(Facet(facet=facet, value=str(value), count=count))
+    db.commit()
+
+def get_facets(db: Session) -> dict[str, dict[str, int]]:
+    facets: dict[str, dict[str, int]] = {}
+    for facet, value, count in db.execute(
+        select(Facet.facet, Facet.value, Facet.count).where(Facet.count > 0)
+    ):
+        facets.setdefault(facet, {})[value] = count
+    return facets
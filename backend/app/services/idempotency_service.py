@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import db_models
+from app.session import run_db
+from app.utils.serialization import type_adapter
+
+IdempotencyKey = db_models.IdempotencyKey
+
+IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", 86400))
+IDEMPOTENCY_PURGE_INTERVAL = int(os.environ.get("IDEMPOTENCY_PURGE_INTERVAL", 300))
+# Reserva sem resposta há mais tempo que isso é considerada abandonada
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.environ.get("IDEMPOTENCY_LOCK_TIMEOUT", 60))
+
+_next_purge = 0.0
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def request_fingerprint(endpoint: str, payload: Optional[BaseModel] = None) -> str:
+    body = payload.model_dump_json() if payload is not None else ""
+    return hashlib.sha256(f"{endpoint}\n{body}".encode()).hexdigest()
+
+def purge_expired_keys(db: Session) -> int:
+    result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= _utcnow()))
+    db.commit()
+    return result.rowcount
+
+def _maybe_purge(db: Session) -> None:
+    # Limpeza oportunista, no máximo uma vez por intervalo por processo
+    global _next_purge
+    now = time.monotonic()
+    if now >= _next_purge:
+        _next_purge = now + IDEMPOTENCY_PURGE_INTERVAL
+        purge_expired_keys(db)
+
+def claim_key(db: Session, consumer_id: int, key: str, request_hash: str) -> tuple[Optional[IdempotencyKey], Optional[datetime]]:
+    # Retorna (registro existente, None) para replay ou conflito, ou
+    # (None, expires_at) quando a chave foi reservada para esta requisição;
+    # expires_at identifica a reserva em _lock_claim.
+    _maybe_purge(db)
+
+    now = _utcnow()
+    record = db.get(IdempotencyKey, (consumer_id, key))
+    if record is not None:
+        claimed_at = record.expires_at - timedelta(seconds=IDEMPOTENCY_TTL)
+        abandoned = record.status_code is None and now - claimed_at > timedelta(seconds=IDEMPOTENCY_LOCK_TIMEOUT)
+        if record.expires_at > now and not abandoned:
+            return record, None
+        # A resposta é gravada no mesmo COMMIT da mutação: reserva sem
+        # resposta significa que nada foi efetivado e pode ser refeita. O
+        # DELETE condicional não apaga uma reserva que acabou de ser concluída.
+        taken = db.execute(delete(IdempotencyKey).where(
+            IdempotencyKey.con_id == consumer_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at == record.expires_at,
+            *([IdempotencyKey.status_code.is_(None)] if abandoned else []),
+        ), execution_options={"synchronize_session": False})
+        if taken.rowcount == 0:
+            db.rollback()
+            return db.get(IdempotencyKey, (consumer_id, key), populate_existing=True), None
+        db.expunge(record)
+
+    expires_at = now + timedelta(seconds=IDEMPOTENCY_TTL)
+    db.add(IdempotencyKey(
+        con_id=consumer_id,
+        key=key,
+        request_hash=request_hash,
+        expires_at=expires_at,
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Outra requisição com a mesma chave chegou primeiro
+        db.rollback()
+        return db.get(IdempotencyKey, (consumer_id, key)), None
+    return None, expires_at
+
+def _lock_claim(db: Session, consumer_id: int, key: str, claimed_until: datetime) -> None:
+    # Trava a linha da reserva até o COMMIT (e abre a transação antes do
+    # primeiro SAVEPOINT, o que o pysqlite só faz com um DML). Se a reserva
+    # expirou e foi tomada por outra requisição, esta não executa.
+    locked = db.execute(
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.con_id == consumer_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at == claimed_until,
+            IdempotencyKey.status_code.is_(None),
+        )
+        .values(expires_at=claimed_until),
+        execution_options={"synchronize_session": False},
+    )
+    if locked.rowcount != 1:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Requisição com esta Idempotency-Key ainda em andamento",
+            headers={"Retry-After": "1"}
+        )
+
+def save_response(db: Session, consumer_id: int, key: str, status_code: int, body: str, headers: Optional[dict] = None) -> None:
+    db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.con_id == consumer_id, IdempotencyKey.key == key)
+        .values(
+            status_code=status_code,
+            response_body=body,
+            response_headers=json.dumps(headers) if headers else None,
+        ),
+        execution_options={"synchronize_session": False},
+    )
+
+def execute_claimed(
+    db: Session,
+    consumer_id: int,
+    key: str,
+    claimed_until: datetime,
+    fn,
+    args: tuple,
+    out,
+    status_code: int,
+    headers: Optional[Callable[[Any], dict]],
+):
+    # fn roda numa sessão ligada à transação de db: os commit() do serviço
+    # viram RELEASE SAVEPOINT e a resposta armazenada entra no mesmo COMMIT
+    # da mutação. Uma queda no meio não deixa mutação sem resposta gravada.
+    _lock_claim(db, consumer_id, key, claimed_until)
+    with Session(
+        bind=db.connection(),
+        join_transaction_mode="create_savepoint",
+        expire_on_commit=db.expire_on_commit,
+        info={"outer": db},
+    ) as session:
+        result = fn(session, *args)
+        if out is not None:
+            result = type_adapter(out).validate_python(result, from_attributes=True)
+
+    body = json.dumps(jsonable_encoder(result), ensure_ascii=False)
+    save_response(db, consumer_id, key, status_code, body, headers(result) if headers else None)
+    db.commit()
+    return result
+
+def release_key(db: Session, consumer_id: int, key: str, claimed_until: datetime) -> None:
+    # Só a própria reserva: se ela foi tomada por outra requisição, fica
+    db.rollback()
+    db.execute(delete(IdempotencyKey).where(
+        IdempotencyKey.con_id == consumer_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.expires_at == claimed_until,
+        IdempotencyKey.status_code.is_(None),
+    ))
+    db.commit()
+
+def _replay(record: IdempotencyKey, request_hash: str) -> JSONResponse:
+    if record.request_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key já utilizada com outra requisição"
+        )
+    if record.status_code is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Requisição com esta Idempotency-Key ainda em andamento",
+            headers={"Retry-After": "1"}
+        )
+    headers = json.loads(record.response_headers) if record.response_headers else {}
+    return JSONResponse(
+        content=json.loads(record.response_body),
+        status_code=record.status_code,
+        headers={**headers, "Idempotent-Replayed": "true"}
+    )
+
+async def run_idempotent(
+    db,
+    key: Optional[str],
+    consumer_id: int,
+    request_hash: str,
+    fn,
+    *args,
+    out=None,
+    status_code: int = status.HTTP_200_OK,
+    headers: Optional[Callable[[Any], dict]] = None,
+):
+    # Executa fn via run_db uma única vez por (consumidor, chave); repetições
+    # recebem a resposta armazenada (com os cabeçalhos de `headers`) sem
+    # refazer a transação.
+    if not key:
+        return await run_db(db, fn, *args, out=out)
+
+    record, claimed_until = await run_db(db, claim_key, consumer_id, key, request_hash)
+    if record is not None:
+        return _replay(record, request_hash)
+
+    try:
+        return await run_db(
+            db, execute_claimed, consumer_id, key, claimed_until, fn, args, out, status_code, headers
+        )
+    except BaseException:
+        # Falhas não são armazenadas: a chave é liberada para nova tentativa
+        await run_db(db, release_key, consumer_id, key, claimed_until)
+        raise
@@ -1,8 +1,16 @@
-from typing import List
-from sqlalchemy.orm import Session
+from typing import AsyncIterator, Iterator, List, Sequence
+from sqlalchemy import select
+from sqlalchemy.orm import Session, lazyload, selectinload
 
-from backend.app import db_models
-from backend.app.models.order import OrderCreate
+from app import db_models
+from app.models.order import OrderCreate, OrderOut
+from app.utils.streaming import stream_query
+
+ORDER_STREAM_BATCH_SIZE = 500
+
+# Itens carregados em lote (um SELECT ... IN por consulta), sem o join com
+# produtos: OrderOut usa os dados copiados para OrderItem.
+ORDER_ITEMS_LOADER = selectinload(db_models.Order.items).options(lazyload(db_models.OrderItem.product))
 
 def get_active_order_for_consumer(db: Session, consumer_id: int) -> db_models.Order:
 
@@ -64,10 +72,36 @@ def get_customer_order_history(db: Session, customer_id: int) -> List[db_models.
 
     return db.query(db_models.Order).filter(
         db_models.Order.con_id == customer_id
-    ).order_by(db_models.Order.ord_created_at.desc()).all()
+    ).order_by(db_models.Order.ord_id.desc()).all()
 
 def get_orders_by_status(db: Session, status: str) -> List[db_models.Order]:
 
     return db.query(db_models.Order).filter(
         db_models.Order.ord_status == status
-    ).all()
\ No newline at end of file
+    ).all()
+
+def _order_stream_statement(*criteria):
+    return (
+        select(db_models.Order)
+        .where(*criteria)
+        .options(ORDER_ITEMS_LOADER)
+        .order_by(db_models.Order.ord_id.desc())
+        .execution_options(yield_per=ORDER_STREAM_BATCH_SIZE)
+    )
+
+def _encode_orders(orders: Sequence[db_models.Order]) -> str:
+    return "".join(OrderOut.model_validate(order).model_dump_json() + "\n" for order in orders)
+
+def stream_customer_order_history(customer_id: int) -> Iterator[str] | AsyncIterator[str]:
+    return stream_query(
+        _order_stream_statement(db_models.Order.con_id == customer_id),
+        _encode_orders,
+        scalars=True,
+    )
+
+def stream_orders_by_status(status: db_models.OrderStatus) -> Iterator[str] | AsyncIterator[str]:
+    return stream_query(
+        _order_stream_statement(db_models.Order.ord_status == status),
+        _encode_orders,
+        scalars=True,
+    )
\ No newline at end of file
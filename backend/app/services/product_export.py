@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+from functools import partial
+from typing import AsyncIterator, Iterator, Sequence
+from sqlalchemy import select
+
+from app import db_models
+from app.utils.streaming import stream_query
+
+Product = db_models.Product
+
+EXPORT_COLUMNS = ("prod_id", "prod_name", "description", "prod_price", "stock", "prod_category_id")
+EXPORT_BATCH_SIZE = 1000
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def _export_statement():
+    # yield_per implica stream_results: cursor do lado do servidor, com no
+    # máximo EXPORT_BATCH_SIZE linhas em memória por vez.
+    return (
+        select(*(getattr(Product, name) for name in EXPORT_COLUMNS))
+        .order_by(Product.prod_id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+def _encode(rows: Sequence, fmt: str) -> str:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            [row.prod_id, row.prod_name, row.description, float(row.prod_price), row.stock, row.prod_category_id]
+            for row in rows
+        )
+        return buffer.getvalue()
+
+    return "".join(
+        json.dumps({
+            "prod_id": row.prod_id,
+            "prod_name": row.prod_name,
+            "description": row.description,
+            "prod_price": float(row.prod_price),
+            "stock": row.stock,
+            "prod_category_id": row.prod_category_id,
+        }, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+def _header(fmt: str) -> str:
+    return ",".join(EXPORT_COLUMNS) + "\r\n" if fmt == "csv" else ""
+
+def iter_export(fmt: str) -> Iterator[str] | AsyncIterator[str]:
+    if fmt not in MEDIA_TYPES:
+        raise ValueError("invalid-format")
+    return stream_query(_export_statement(), partial(_encode, fmt=fmt), header=_header(fmt))
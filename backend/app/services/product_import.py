@@ -0,0 +1,275 @@
+import csv
+import json
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+from pydantic import ValidationError
+from sqlalchemy import insert, select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import db_models
+from app.models.product import ProductImportRow
+from app.services import facet_service
+from app.services.cart_service import reconcile_cart_totals
+from app.services.category_service import list_categories
+from app.services.product_service import invalidate_products
+from app.session import after_commit
+from app.utils.sql import upsert_insert
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+products = db_models.Product.__table__
+UPSERT_COLUMNS = ("prod_name", "description", "prod_price", "stock", "prod_category_id")
+SYNC_ID_SEQUENCE = text(
+    "SELECT setval(pg_get_serial_sequence('products', 'prod_id'), (SELECT max(prod_id) FROM products))"
+)
+
+async def aiter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, bytes]]:
+    # Quebra um corpo recebido em streaming em linhas numeradas, sem
+    # carregá-lo inteiro na memória. A decodificação fica com o importador,
+    # que reporta bytes inválidos como erro da linha.
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, line
+    if buffer:
+        yield line_no + 1, buffer
+
+class _NeedMoreLines(Exception):
+    pass
+
+class _LineFeed:
+    # Entrada de um csv.reader que dura o import inteiro: um campo entre
+    # aspas pode conter quebras de linha e atravessar lotes. Quando as linhas
+    # acabam no meio de um registro, o reader é interrompido e o registro é
+    # relido do início assim que o próximo lote chegar.
+
+    def __init__(self):
+        self.lines: list[tuple[int, str]] = []
+        self.position = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if self.position >= len(self.lines):
+            raise _NeedMoreLines
+        self.position += 1
+        return self.lines[self.position - 1][1]
+
+    def consume(self) -> None:
+        del self.lines[:self.position]
+        self.position = 0
+
+def _sync_id_sequence(db: Session) -> None:
+    # No Postgres, INSERT com prod_id explícito não avança a sequência do
+    # SERIAL; sem o setval o próximo produto sem id colidiria com um importado.
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(SYNC_ID_SEQUENCE)
+
+class ProductImporter:
+
+    def __init__(self, fmt: str = "ndjson"):
+        if fmt not in ("ndjson", "csv"):
+            raise ValueError("invalid-format")
+        self.fmt = fmt
+        self.header: list[str] | None = None
+        self.categories: dict[str, str] = {}
+        self.processed = 0
+        self.imported = 0
+        self.error_count = 0
+        self.errors: list[dict] = []
+        self._feed = _LineFeed()
+        self._reader = csv.reader(self._feed)
+
+    def _error(self, line_no: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+    def load_categories(self, db: Session) -> None:
+        # Aceita tanto o nome quanto o id da categoria; grava o nome, como
+        # create_new_product.
+        for category in list_categories(db):
+            self.categories[category["name"]] = category["name"]
+            self.categories[str(category["id"])] = category["name"]
+
+    def _invalid(self, line_no: int, error: Exception) -> None:
+        self.processed += 1
+        self._error(line_no, f"invalid {self.fmt}: {error}")
+
+    def _decode(self, line_no: int, line: bytes) -> str | None:
+        try:
+            return line.decode("utf-8-sig" if line_no == 1 else "utf-8")
+        except UnicodeDecodeError as e:
+            self.processed += 1
+            self._error(line_no, f"invalid utf-8: {e}")
+            return None
+
+    def _csv_records(self) -> Iterator[tuple[int, dict]]:
+        feed = self._feed
+        while feed.position < len(feed.lines):
+            start = feed.position
+            line_no = feed.lines[start][0]
+            try:
+                values = next(self._reader)
+            except _NeedMoreLines:
+                feed.position = start
+                return
+            except csv.Error as e:
+                feed.consume()
+                self._invalid(line_no, e)
+                continue
+            feed.consume()
+
+            if not any(value.strip() for value in values):
+                continue
+            if self.header is None:
+                self.header = [name.strip() for name in values]
+                continue
+            yield line_no, {key: value for key, value in zip(self.header, values) if value != ""}
+
+    def _records(self, lines: Iterable[tuple[int, bytes]]) -> Iterator[tuple[int, dict]]:
+        for line_no, raw in lines:
+            line = self._decode(line_no, raw)
+            if line is None:
+                continue
+
+            if self.fmt == "csv":
+                self._feed.lines.append((line_no, line + "\n"))
+                yield from self._csv_records()
+                continue
+
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+                if not isinstance(data, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as e:
+                self._invalid(line_no, e)
+                continue
+            yield line_no, data
+
+    def _to_row(self, line_no: int, data: dict) -> dict | None:
+        self.processed += 1
+        if "description" in data and "prod_description" not in data:
+            data["prod_description"] = data.pop("description")
+        try:
+            item = ProductImportRow.model_validate(data)
+        except ValidationError as e:
+            error = e.errors()[0]
+            self._error(line_no, f"{'.'.join(map(str, error['loc']))}: {error['msg']}")
+            return None
+
+        category = self.categories.get(item.prod_category_id)
+        if category is None:
+            self._error(line_no, "category-not-found")
+            return None
+
+        return {
+            "line": line_no,
+            "prod_id": item.prod_id,
+            "prod_name": item.prod_name,
+            "description": item.prod_description or "",
+            "prod_price": item.prod_price,
+            "stock": item.stock,
+            "prod_category_id": category,
+        }
+
+    def _write(self, db: Session, rows: list[dict]) -> None:
+        new_rows = [{k: v for k, v in row.items() if k not in ("line", "prod_id")} for row in rows if row["prod_id"] is None]
+        upserts = [{k: v for k, v in row.items() if k != "line"} for row in rows if row["prod_id"] is not None]
+
+        # Ids explícitos primeiro: os produtos novos recebem ids da sequência
+        # já ajustada e não colidem com os importados no mesmo lote.
+        if upserts:
+            stmt = upsert_insert(db, products)
+            if stmt is not None:
+                db.execute(stmt.on_conflict_do_update(
+                    index_elements=[products.c.prod_id],
+                    set_={name: stmt.excluded[name] for name in UPSERT_COLUMNS},
+                ), upserts)
+            else:
+                for row in upserts:
+                    db.merge(db_models.Product(**row))
+            _sync_id_sequence(db)
+        if new_rows:
+            db.execute(insert(products), new_rows)
+
+    def _previous_facets(self, db: Session, rows: list[dict]) -> dict[int, list[tuple[str, str]]]:
+        product_ids = {row["prod_id"] for row in rows if row["prod_id"] is not None}
+        if not product_ids:
+            return {}
+        return {
+            product.prod_id: facet_service.product_facets(product)
+            for product in db.execute(
+                select(products.c.prod_id, products.c.prod_category_id, products.c.prod_price, products.c.stock)
+                .where(products.c.prod_id.in_(product_ids))
+            )
+        }
+
+    def _written(self, db: Session, rows: list[dict], previous: dict[int, list[tuple[str, str]]]) -> None:
+        # Carrinhos, facetas e cache acompanham cada lote no mesmo COMMIT:
+        # se o upload for interrompido, o que já foi gravado está coerente.
+        old, new, updated_ids = [], [], set()
+        for row in reversed(rows):
+            prod_id = row["prod_id"]
+            if prod_id is not None:
+                # O mesmo id repetido no lote: vale a última gravação
+                if prod_id in updated_ids:
+                    continue
+                updated_ids.add(prod_id)
+                old.extend(previous.get(prod_id, ()))
+            new.extend(facet_service.row_facets(row))
+
+        facet_service.facets_replaced(db, old, new)
+        if updated_ids:
+            # Produtos existentes podem ter mudado de preço
+            reconcile_cart_totals(db, updated_ids)
+            after_commit(db, invalidate_products, *updated_ids)
+
+    def import_lines(self, db: Session, lines: list[tuple[int, bytes]]) -> None:
+        rows = [row for row in (self._to_row(line_no, data) for line_no, data in self._records(lines)) if row]
+        if not rows:
+            return
+
+        previous = self._previous_facets(db, rows)
+        try:
+            with db.begin_nested():
+                self._write(db, rows)
+        except SQLAlchemyError:
+            # O lote falhou como um todo: refaz linha a linha para isolar os
+            # registros inválidos sem descartar os demais.
+            accepted = []
+            for row in rows:
+                try:
+                    with db.begin_nested():
+                        self._write(db, [row])
+                    accepted.append(row)
+                except SQLAlchemyError as e:
+                    cause = getattr(e, "orig", None) or e
+                    self._error(row["line"], f"{type(cause).__name__}: {str(cause).splitlines()[0]}")
+            rows = accepted
+
+        self._written(db, rows, previous)
+        db.commit()
+        self.imported += len(rows)
+
+    def finish(self, db: Session) -> None:
+        if self._feed.lines:
+            # Campo entre aspas nunca fechado
+            self._invalid(self._feed.lines[0][0], csv.Error("unexpected end of data"))
+            self._feed.lines.clear()
+
+    def report(self) -> dict:
+        return {
+            "processed": self.processed,
+            "imported": self.imported,
+            "failed": self.error_count,
+            "errors": self.errors,
+        }
@@ -1,10 +1,51 @@
+import base64
+import json
+import os
 from typing import Optional, List
+from sqlalchemy import Row, tuple_
 from sqlalchemy.orm import Session
 from sqlalchemy.inspection import inspect
 
 from app.db_models import Category
 from app import db_models
 from app.models.product import ProductCreate  
+from app.services import facet_service
+from app.services.cart_service import reconcile_cart_totals
+from app.services.category_service import get_category_by_name
+from app.session import run_db
+from app.utils.cache_backend import get_cache
+from app.utils.serialization import row_dicts
+
+# Registros de produto já serializados ficam em "product:<prod_id>"
+PRODUCT_CACHE_TTL = float(os.environ.get("PRODUCT_CACHE_TTL", 60))
+
+# Colunas de ProductOut: listagens leem linhas (tuplas), sem montar objetos
+# ORM nem passar pelo identity map, e as devolvem como dicts.
+Product = db_models.Product
+PRODUCT_COLUMNS = (
+    Product.prod_id,
+    Product.prod_name,
+    Product.description,
+    Product.prod_price,
+    Product.stock,
+    Product.prod_category_id,
+)
+
+def _product_key(product_id: int) -> str:
+    return f"product:{product_id}"
+
+def invalidate_products(*product_ids: int) -> None:
+    get_cache().delete(*(_product_key(product_id) for product_id in product_ids))
+
+def serialize_product(product: db_models.Product) -> dict:
+    return {
+        "prod_id": product.prod_id,
+        "prod_name": product.prod_name,
+        "description": product.description,
+        "prod_price": float(product.prod_price),
+        "stock": product.stock,
+        "prod_category_id": product.prod_category_id,
+    }
 
 def _product_has_columns(*names: str) -> bool:
     cols = set(inspect(db_models.Product).columns.keys())
@@ -12,9 +53,7 @@ def _product_has_columns(*names: str) -> bool:
 
 def create_new_product(db: Session, product_data: ProductCreate) -> db_models.Product:
   
-    category = db.query(Category).filter(
-        Category.name == product_data.prod_category_id
-    ).first()
+    category = get_category_by_name(db, product_data.prod_category_id)
     
     if not category:
         raise ValueError("category-not-found")
@@ -24,11 +63,15 @@ def create_new_product(db: Session, product_data: ProductCreate) -> db_models.Pr
     #     raise ValueError("category-not-found")
   
     data = product_data.model_dump()
+    data["description"] = data.pop("prod_description") or ""
     
     obj = db_models.Product(**data)
     db.add(obj)
+    db.flush()
+    facet_service.product_added(db, obj)
     db.commit()
     db.refresh(obj)
+    invalidate_products(obj.prod_id)
     return obj
 
 def get_product_item(db: Session, item_id: int) -> db_models.Product:
@@ -37,14 +80,27 @@ def get_product_item(db: Session, item_id: int) -> db_models.Product:
         raise ValueError("product-not-found")
     return item
 
+def load_product_record(db: Session, item_id: int) -> dict:
+    return serialize_product(get_product_item(db, item_id))
+
+async def get_product_record(db: Session, item_id: int) -> dict:
+    # Cache fora do event loop (aget/aset): no modo assíncrono run_db executa
+    # no thread do próprio loop, então o Redis não é consultado lá dentro.
+    cache = get_cache()
+    record = await cache.aget(_product_key(item_id))
+    if record is None:
+        record = await run_db(db, load_product_record, item_id)
+        await cache.aset(_product_key(item_id), record, ttl=PRODUCT_CACHE_TTL)
+    return record
+
 def list_products(
     db: Session, 
     category: Optional[int] = None,
     page: int = 1,
     size: int = 50
-) -> List[db_models.Product]:
+) -> List[dict]:
     
-    q = db.query(db_models.Product)
+    q = db.query(*PRODUCT_COLUMNS)
     
     if category is not None:
         q = q.filter(db_models.Product.prod_category_id == category)
@@ -54,7 +110,52 @@ def list_products(
     else:
         q = q.order_by(db_models.Product.prod_id)
     
-    return q.offset((page - 1) * size).limit(size).all()
+    return row_dicts(q.offset((page - 1) * size).limit(size).all())
+
+def encode_cursor(product: db_models.Product | Row) -> str:
+    raw = json.dumps([product.prod_name, product.prod_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        name, prod_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("invalid-cursor")
+
+    if not isinstance(name, str) or not isinstance(prod_id, int):
+        raise ValueError("invalid-cursor")
+    return name, prod_id
+
+def list_products_after(
+    db: Session,
+    category: Optional[int] = None,
+    after: Optional[str] = None,
+    size: int = 50
+) -> dict:
+    # Paginação por chave (prod_name, prod_id): cada página é uma busca no
+    # índice ix_products_category_name_id, independente da profundidade.
+    q = db.query(*PRODUCT_COLUMNS)
+
+    if category is not None:
+        q = q.filter(db_models.Product.prod_category_id == category)
+
+    if after:
+        name, prod_id = decode_cursor(after)
+        q = q.filter(
+            tuple_(db_models.Product.prod_name, db_models.Product.prod_id) > (name, prod_id)
+        )
+
+    items = q.order_by(
+        db_models.Product.prod_name, db_models.Product.prod_id
+    ).limit(size + 1).all()
+
+    next_cursor = None
+    if len(items) > size:
+        items = items[:size]
+        next_cursor = encode_cursor(items[-1])
+
+    return {"items": row_dicts(items), "next_cursor": next_cursor}
 
 def update_product(
     db: Session, 
@@ -62,16 +163,27 @@ def update_product(
     product_data: dict
 ) -> db_models.Product:
     product = get_product_item(db, product_id)
+    old_facets = facet_service.product_facets(product)
+    old_cart_fields = (product.prod_price, product.prod_name)
     
     for key, value in product_data.items():
         if hasattr(product, key) and value is not None:
             setattr(product, key, value)
     
+    facet_service.product_changed(db, old_facets, product)
+    # Preço e nome aparecem nos carrinhos: recalcula os totais e muda a
+    # versão (ETag) dos carrinhos que contêm o produto.
+    if (product.prod_price, product.prod_name) != old_cart_fields:
+        db.flush()
+        reconcile_cart_totals(db, [product_id])
     db.commit()
     db.refresh(product)
+    invalidate_products(product_id)
     return product
 
 def delete_product(db: Session, product_id: int) -> None:
     product = get_product_item(db, product_id)
+    facet_service.product_removed(db, product)
     db.delete(product)
-    db.commit()
\ No newline at end of file
+    db.commit()
+    invalidate_products(product_id)
\ No newline at end of file
@@ -0,0 +1,85 @@
+from sqlalchemy import DDL, column, event, func, literal_column, or_, table, text
+from sqlalchemy.orm import Session
+
+from app import db_models
+from app.services.product_service import PRODUCT_COLUMNS
+from app.utils.serialization import row_dicts
+
+Product = db_models.Product
+products_fts = table("products_fts", column("rowid"))
+
+# SQLite: tabela FTS5 de conteúdo externo, mantida por triggers. O trigger de
+# UPDATE só observa prod_name/description, para não reindexar a cada baixa
+# de estoque.
+SQLITE_SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        prod_name, description, content='products', content_rowid='prod_id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, prod_name, description)
+        VALUES (new.prod_id, new.prod_name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, prod_name, description)
+        VALUES ('delete', old.prod_id, old.prod_name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF prod_name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, prod_name, description)
+        VALUES ('delete', old.prod_id, old.prod_name, old.description);
+        INSERT INTO products_fts(rowid, prod_name, description)
+        VALUES (new.prod_id, new.prod_name, new.description);
+    END""",
+]
+
+# Postgres: índice GIN de expressão. _search_document() precisa gerar
+# exatamente a mesma expressão para que o planner use o índice.
+POSTGRES_SEARCH_DDL = [
+    """CREATE INDEX IF NOT EXISTS ix_products_search ON products USING GIN (
+        to_tsvector('simple', coalesce(prod_name, '') || ' ' || coalesce(description, ''))
+    )""",
+]
+
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+def _search_document():
+    empty = literal_column("''")
+    return func.to_tsvector(
+        literal_column("'simple'"),
+        func.coalesce(Product.prod_name, empty) + literal_column("' '") + func.coalesce(Product.description, empty),
+    )
+
+def _fts5_query(terms: list[str]) -> str:
+    # Cada termo vira uma frase com prefixo ("termo"*), evitando que a
+    # sintaxe do FTS5 seja interpretada a partir da entrada do usuário.
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+def search_products(db: Session, query: str, page: int = 1, size: int = 20) -> list[dict]:
+    terms = query.split()
+    if not terms:
+        raise ValueError("empty-query")
+
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        ts_query = func.plainto_tsquery(literal_column("'simple'"), query)
+        document = _search_document()
+        q = db.query(*PRODUCT_COLUMNS).filter(document.op("@@")(ts_query)).order_by(
+            func.ts_rank(document, ts_query).desc(), Product.prod_id
+        )
+    elif dialect == "sqlite":
+        q = db.query(*PRODUCT_COLUMNS).join(
+            products_fts, products_fts.c.rowid == Product.prod_id
+        ).filter(
+            text("products_fts MATCH :fts_query").bindparams(fts_query=_fts5_query(terms))
+        ).order_by(text("bm25(products_fts)"), Product.prod_id)
+    else:
+        q = db.query(*PRODUCT_COLUMNS)
+        for term in terms:
+            pattern = f"%{term}%"
+            q = q.filter(or_(Product.prod_name.ilike(pattern), Product.description.ilike(pattern)))
+        q = q.order_by(Product.prod_name, Product.prod_id)
+
+    return row_dicts(q.offset((page - 1) * size).limit(size).all())
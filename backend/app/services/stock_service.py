@@ -0,0 +1,73 @@
+from typing import Iterable
+from sqlalchemy import Integer, bindparam, column, select, update, values
+from sqlalchemy.orm import Session
+
+from app import db_models
+
+products = db_models.Product.__table__
+
+def _aggregate(lines: Iterable[tuple[int, int]]) -> dict[int, int]:
+    quantities: dict[int, int] = {}
+    for prod_id, quantity in lines:
+        quantities[prod_id] = quantities.get(prod_id, 0) + quantity
+    return quantities
+
+def _reserve_postgres(db: Session, quantities: dict[int, int]) -> list[int]:
+    # Uma única instrução: UPDATE ... FROM (VALUES ...) RETURNING prod_id
+    requested = values(
+        column("pid", Integer), column("qty", Integer), name="requested"
+    ).data(list(quantities.items()))
+
+    stmt = (
+        update(products)
+        .where(
+            products.c.prod_id == requested.c.pid,
+            products.c.stock >= requested.c.qty,
+        )
+        .values(stock=products.c.stock - requested.c.qty)
+        .returning(products.c.prod_id)
+    )
+    reserved = set(db.execute(stmt).scalars())
+    return [prod_id for prod_id in quantities if prod_id not in reserved]
+
+def _reserve_executemany(db: Session, quantities: dict[int, int]) -> list[int]:
+    stmt = (
+        update(products)
+        .where(
+            products.c.prod_id == bindparam("pid"),
+            products.c.stock >= bindparam("qty"),
+        )
+        .values(stock=products.c.stock - bindparam("qty"))
+    )
+    params = [{"pid": prod_id, "qty": qty} for prod_id, qty in quantities.items()]
+
+    if not db.get_bind().dialect.supports_sane_multi_rowcount:
+        return [p["pid"] for p in params if db.execute(stmt, p).rowcount != 1]
+
+    savepoint = db.begin_nested()
+    if db.execute(stmt, params).rowcount == len(params):
+        savepoint.commit()
+        return []
+    savepoint.rollback()
+
+    # Caminho de erro: apenas leitura para descobrir quais linhas falharam.
+    stock = dict(db.execute(
+        select(products.c.prod_id, products.c.stock)
+        .where(products.c.prod_id.in_(quantities))
+    ).all())
+    failed = [pid for pid, qty in quantities.items() if stock.get(pid, 0) < qty]
+    return failed or list(quantities)
+
+def reserve_stock(db: Session, lines: Iterable[tuple[int, int]]) -> list[int]:
+    """Decrementa o estoque de todas as linhas (prod_id, quantidade) de forma atômica.
+
+    Retorna os prod_id que não puderam ser reservados. Quando a lista não é
+    vazia nada deve ser persistido: cabe ao chamador executar o rollback.
+    """
+    quantities = _aggregate(lines)
+    if not quantities:
+        return []
+
+    if db.get_bind().dialect.name == "postgresql":
+        return _reserve_postgres(db, quantities)
+    return _reserve_executemany(db, quantities)
@@ -1,25 +1,91 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.concurrency import run_in_threadpool
 import os
 from dotenv import load_dotenv
 
+from app.utils.instrumentation import instrument_queries
+from app.utils.serialization import type_adapter
+from app.utils.metrics import TimedQueuePool, TimedAsyncAdaptedQueuePool, instrument_pool
+
 load_dotenv()
 
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./ecommerce.db")
 
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# postgresql+asyncpg:// ou sqlite+aiosqlite:// ativam a camada assíncrona
+ASYNC_DRIVERS = ("+asyncpg", "+aiosqlite")
+IS_ASYNC = DATABASE_URL.split("://", 1)[0].endswith(ASYNC_DRIVERS)
+
+connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).lower() in ("1", "true", "yes", "on")
+
+def _pool_options() -> dict:
+    options = {"pool_pre_ping": _env_flag("DB_POOL_PRE_PING", "true")}
+    if DATABASE_URL.startswith("sqlite"):
+        return options
+
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if IS_ASYNC else TimedQueuePool,
+        pool_size=int(os.environ.get("DB_POOL_SIZE", 5)),
+        max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+        pool_timeout=float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+        pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+    )
+    return options
+
+if IS_ASYNC:
+    async_engine = create_async_engine(DATABASE_URL, connect_args=connect_args, **_pool_options())
+    engine = async_engine.sync_engine
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=True, expire_on_commit=False)
 else:
-    engine = create_engine(DATABASE_URL)
+    async_engine = None
+    engine = create_engine(DATABASE_URL, connect_args=connect_args, **_pool_options())
+    AsyncSessionLocal = None
+
+instrument_pool(engine)
+instrument_queries(engine)
 
 class Base(DeclarativeBase):
     pass
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=True, bind=engine)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+if IS_ASYNC:
+    async def get_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+else:
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+def after_commit(db: Session, fn, *args) -> None:
+    # Executa fn depois do COMMIT real. Dentro de run_idempotent a sessão do
+    # serviço está ligada à transação da sessão da requisição (info["outer"])
+    # e o commit dela só libera um SAVEPOINT.
+    session = db.info.get("outer", db)
+    if not session.in_transaction():
+        fn(*args)
+        return
+    event.listen(session, "after_commit", lambda _: fn(*args), once=True)
+
+async def run_db(db, fn, *args, out=None):
+    # Executa fn(session, *args) sem bloquear o event loop: via greenlet
+    # (AsyncSession.run_sync) no modo assíncrono ou no threadpool no modo
+    # síncrono. Com `out`, a serialização acontece ainda dentro da sessão,
+    # evitando lazy loads fora do greenlet.
+    def call(session):
+        result = fn(session, *args)
+        if out is None:
+            return result
+        return type_adapter(out).validate_python(result, from_attributes=True)
+
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(call)
+    return await run_in_threadpool(call, db)
@@ -0,0 +1,215 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any
+
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache-invalidation"
+
+class CacheBackend(ABC):
+    # Interface comum: valores precisam ser serializáveis em JSON. delete()
+    # vale para todos os processos que compartilham o backend.
+
+    @abstractmethod
+    def get(self, key: str) -> Any | None: ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None: ...
+
+    @abstractmethod
+    def delete(self, *keys: str) -> None: ...
+
+    @abstractmethod
+    def stats(self) -> dict: ...
+
+    # Para rotas async: get/set podem fazer I/O de rede, então por padrão
+    # rodam no threadpool em vez de bloquear o event loop.
+    async def aget(self, key: str) -> Any | None:
+        return await run_in_threadpool(self.get, key)
+
+    async def aset(self, key: str, value: Any, ttl: float | None = None) -> None:
+        await run_in_threadpool(self.set, key, value, ttl)
+
+class MemoryBackend(CacheBackend):
+
+    def __init__(self, maxsize: int = 10000):
+        self._cache = LRUCache(maxsize=maxsize)
+
+    def get(self, key: str) -> Any | None:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        self._cache.set(key, value, expires_at=expires_at)
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.delete(key)
+
+    # Só memória local: não vale o salto para o threadpool
+    async def aget(self, key: str) -> Any | None:
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any, ttl: float | None = None) -> None:
+        self.set(key, value, ttl)
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self._cache.stats()}
+
+class RedisBackend(CacheBackend):
+    # Qualquer cliente compatível com redis-py (inclusive fakeredis nos
+    # testes). Mantém um near-cache local de TTL curto, invalidado via pub/sub
+    # quando qualquer processo chama set() ou delete(). Cada mensagem leva a
+    # origem, para o próprio processo não descartar o que acabou de gravar.
+
+    def __init__(
+        self,
+        client,
+        prefix: str = "ecommerce:",
+        channel: str = INVALIDATION_CHANNEL,
+        local_maxsize: int = 1024,
+        local_ttl: float = 5.0,
+    ):
+        self.client = client
+        self.prefix = prefix
+        self.channel = prefix + channel
+        self._local = LRUCache(maxsize=local_maxsize, ttl=local_ttl)
+        self._origin = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+        self._stopped = threading.Event()
+        self._pubsub = client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(self.channel)
+        self._listener = threading.Thread(target=self._listen, name="cache-invalidation", daemon=True)
+        self._listener.start()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisBackend":
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_URL aponta para Redis, mas o pacote 'redis' não está instalado")
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _listen(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                message = self._pubsub.get_message(timeout=1.0)
+            except Exception:
+                logger.exception("Falha ao ler invalidações do cache")
+                self._stopped.wait(1.0)
+                continue
+
+            if not message or message.get("type") != "message":
+                continue
+            data = message["data"]
+            if isinstance(data, bytes):
+                data = data.decode()
+            origin, _, key = data.partition(" ")
+            if origin != self._origin:
+                self._local.delete(key)
+
+    def _get_local(self, key: str) -> Any | None:
+        value = self._local.get(key)
+        if value is not None:
+            self._incr("hits")
+        return value
+
+    def _get_remote(self, key: str) -> Any | None:
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception:
+            logger.warning("Cache indisponível ao ler %s", key, exc_info=True)
+            self._incr("errors")
+            return None
+
+        if raw is None:
+            self._incr("misses")
+            return None
+
+        self._incr("hits")
+        value = json.loads(raw)
+        self._local.set(key, value)
+        return value
+
+    def get(self, key: str) -> Any | None:
+        value = self._get_local(key)
+        return value if value is not None else self._get_remote(key)
+
+    async def aget(self, key: str) -> Any | None:
+        # Acerto no near-cache direto no event loop; só o Redis vai ao threadpool
+        value = self._get_local(key)
+        return value if value is not None else await run_in_threadpool(self._get_remote, key)
+
+    def _publish(self, pipe, keys) -> None:
+        for key in keys:
+            pipe.publish(self.channel, f"{self._origin} {key}")
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        # Gravação e invalidação num único round-trip
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.set(self.prefix + key, json.dumps(value), ex=int(ttl) if ttl else None)
+            self._publish(pipe, [key])
+            pipe.execute()
+        except Exception:
+            logger.warning("Cache indisponível ao gravar %s", key, exc_info=True)
+            self._incr("errors")
+            return
+        self._local.set(key, value)
+
+    def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        for key in keys:
+            self._local.delete(key)
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.delete(*(self.prefix + key for key in keys))
+            self._publish(pipe, keys)
+            pipe.execute()
+        except Exception:
+            logger.warning("Cache indisponível ao invalidar %s", keys, exc_info=True)
+            self._incr("errors")
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._listener.join(timeout=2.0)
+        self._pubsub.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "redis",
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "local": self._local.stats(),
+            }
+
+@lru_cache(maxsize=1)
+def get_cache() -> CacheBackend:
+    # CACHE_URL=memory:// (padrão, por processo) ou redis://host:6379/0
+    url = os.environ.get("CACHE_URL", "memory://")
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend.from_url(url)
+    return MemoryBackend(maxsize=int(os.environ.get("CACHE_MAX_ENTRIES", 10000)))
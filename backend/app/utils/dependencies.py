@@ -1,63 +1,129 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from jose import JWTError
 
-from app.session import get_db
+from app.session import get_db, run_db
 from app import db_models
 from app.utils.security import decode_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), 
+# Modo sem estado: o usuário é montado a partir das claims do token, sem
+# consultar as tabelas de usuários. Com AUTH_USER_CACHE_TTL > 0, a existência
+# do usuário é revalidada no banco no máximo uma vez por TTL.
+AUTH_STATELESS = os.environ.get("AUTH_STATELESS", "false").lower() in ("1", "true", "yes", "on")
+AUTH_USER_CACHE_TTL = float(os.environ.get("AUTH_USER_CACHE_TTL", 0))
+
+@dataclass(frozen=True)
+class ConsumerPrincipal:
+    con_id: int
+    con_email: str | None = None
+    con_name: str | None = None
+
+@dataclass(frozen=True)
+class SellerPrincipal:
+    sel_id: int
+    sel_email: str | None = None
+    sel_name: str | None = None
+
+_user_cache: dict[tuple[str, int], float] = {}
+_user_cache_lock = threading.Lock()
+
+def _user_recently_seen(scope: str, user_id: int) -> bool:
+    with _user_cache_lock:
+        expires_at = _user_cache.get((scope, user_id))
+        if expires_at is None:
+            return False
+        if expires_at < time.monotonic():
+            del _user_cache[(scope, user_id)]
+            return False
+        return True
+
+def _remember_user(scope: str, user_id: int) -> None:
+    with _user_cache_lock:
+        _user_cache[(scope, user_id)] = time.monotonic() + AUTH_USER_CACHE_TTL
+
+def revoke_user(scope: str, user_id: int) -> None:
+    with _user_cache_lock:
+        _user_cache.pop((scope, user_id), None)
+
+def _principal_from_claims(scope: str, user_id: int, payload: dict) -> ConsumerPrincipal | SellerPrincipal | None:
+    if scope == "consumer":
+        return ConsumerPrincipal(user_id, payload.get("email"), payload.get("name"))
+    if scope == "seller":
+        return SellerPrincipal(user_id, payload.get("email"), payload.get("name"))
+    return None
+
+def _load_user(db: Session, scope: str, user_id: int) -> db_models.Consumers | db_models.SellerUser | None:
+    if scope == "consumer":
+        return db.get(db_models.Consumers, user_id)
+    if scope == "seller":
+        return db.get(db_models.SellerUser, user_id)
+    return None
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> db_models.Consumers | db_models.SellerUser:
+) -> db_models.Consumers | db_models.SellerUser | ConsumerPrincipal | SellerPrincipal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    payload = decode_token(token)
+    if payload is None:
+        raise credentials_exception
+
+    user_id: str = payload.get("sub")
+    scope: str = payload.get("scope")
+    if user_id is None or scope is None:
+        raise credentials_exception
+
     try:
-        payload = decode_token(token)
-        if payload is None:
-            raise credentials_exception
-        
-        user_id: str = payload.get("sub")
-        scope: str = payload.get("scope")
-        if user_id is None or scope is None:
-            raise credentials_exception
-            
-    except JWTError:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
         raise credentials_exception
 
-    user = None
-    if scope == "consumer":
-        user = db.get(db_models.Consumers, int(user_id))
-    elif scope == "seller":
-        user = db.get(db_models.SellerUser, int(user_id))
+    if AUTH_STATELESS:
+        principal = _principal_from_claims(scope, user_id, payload)
+        if principal is None:
+            raise credentials_exception
+
+        if AUTH_USER_CACHE_TTL > 0 and not _user_recently_seen(scope, user_id):
+            if await run_db(db, _load_user, scope, user_id) is None:
+                raise credentials_exception
+            _remember_user(scope, user_id)
+
+        return principal
+
+    user = await run_db(db, _load_user, scope, user_id)
 
     if user is None:
         raise credentials_exception
-        
+
     return user
 
 def get_current_consumer(
     current_user: db_models.Consumers = Depends(get_current_user)
-) -> db_models.Consumers:
-    if not isinstance(current_user, db_models.Consumers):
+) -> db_models.Consumers | ConsumerPrincipal:
+    if not isinstance(current_user, (db_models.Consumers, ConsumerPrincipal)):
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, 
+            status_code=status.HTTP_403_FORBIDDEN,
             detail="Operation not permitted for this user type"
         )
     return current_user
 
 def get_current_seller_user(
     current_user: db_models.SellerUser = Depends(get_current_user)
-) -> db_models.SellerUser:
-    if not isinstance(current_user, db_models.SellerUser):
+) -> db_models.SellerUser | SellerPrincipal:
+    if not isinstance(current_user, (db_models.SellerUser, SellerPrincipal)):
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, 
+            status_code=status.HTTP_403_FORBIDDEN,
             detail="Operation not permitted for this user type"
         )
-    return current_user
\ No newline at end of file
+    return current_user
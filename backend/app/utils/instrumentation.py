@@ -0,0 +1,92 @@
+import os
+import time
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match
+
+from app.utils.metrics import RequestStats, current_request_stats, record_query, request_metrics
+from app.utils.slow_queries import slow_query_log
+
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "true").lower() in ("1", "true", "yes", "on")
+
+def instrument_queries(engine) -> None:
+    # Pilha em conn.info: cursores podem ser aninhados (ex.: flush durante
+    # a iteração de um resultado).
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_start"].pop()
+        record_query(duration)
+        slow_query_log.observe(conn, statement, parameters, executemany, duration)
+
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+def _server_timing(stats: RequestStats, total: float) -> str:
+    app_time = max(total - stats.db_time - stats.hash_time, 0.0)
+    return ", ".join((
+        f'db;dur={stats.db_time * 1000:.2f};desc="{stats.db_queries} queries"',
+        f"hash;dur={stats.hash_time * 1000:.2f}",
+        f"app;dur={app_time * 1000:.2f}",
+        f"total;dur={total * 1000:.2f}",
+    ))
+
+class RequestMetricsMiddleware:
+    # Middleware ASGI puro: não bufferiza o corpo, então respostas em
+    # streaming continuam em streaming. As métricas da rota são registradas
+    # quando o corpo termina; o Server-Timing cobre até o início da resposta.
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: dict = {}
+
+    def _route_path(self, scope) -> str:
+        # Usa o template da rota (/orders/{order_id}), nunca o caminho bruto,
+        # para manter a cardinalidade dos rótulos limitada.
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            path = "unmatched"
+            for route in scope["app"].router.routes:
+                if getattr(route, "endpoint", None) is endpoint and route.matches(scope)[0] == Match.FULL:
+                    path = route.path
+                    break
+            self._route_paths[endpoint] = path
+        return path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(route=f"{scope['method']} {scope['path']}")
+        token = current_request_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", _server_timing(stats, time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request_stats.reset(token)
+            request_metrics.observe(
+                scope["method"], self._route_path(scope), status_code, time.perf_counter() - start, stats
+            )
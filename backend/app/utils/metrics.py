@@ -0,0 +1,205 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+class Histogram:
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.total, self.count
+
+        cumulative, running = {}, 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            running += bucket_count
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = count
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+    def prometheus(self, name: str, labels: str = "") -> list[str]:
+        snapshot = self.snapshot()
+        prefix = labels + "," if labels else ""
+        lines = [
+            f'{name}_bucket{{{prefix}le="{bound}"}} {count}'
+            for bound, count in snapshot["buckets"].items()
+        ]
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {snapshot['sum']}")
+        lines.append(f"{name}_count{suffix} {snapshot['count']}")
+        return lines
+
+class PoolMetrics:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.wait_time = Histogram(POOL_WAIT_BUCKETS)
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.timeouts = 0
+
+    def _incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self, pool) -> dict:
+        stats = {
+            "pool_class": type(pool).__name__,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "wait_seconds": self.wait_time.snapshot(),
+        }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+            )
+        return stats
+
+pool_metrics = PoolMetrics()
+
+class _TimedPoolMixin:
+    # Mede o tempo de espera por uma conexão (inclui abertura em overflow).
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics._incr("timeouts")
+            raise
+        finally:
+            pool_metrics.wait_time.observe(time.perf_counter() - start)
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+def instrument_pool(engine) -> None:
+    event.listen(engine, "connect", lambda *args: pool_metrics._incr("connects"))
+    event.listen(engine, "checkout", lambda *args: pool_metrics._incr("checkouts"))
+    event.listen(engine, "invalidate", lambda *args: pool_metrics._incr("invalidations"))
+
+@dataclass
+class RequestStats:
+    route: str = ""
+    db_queries: int = 0
+    db_time: float = 0.0
+    hash_time: float = 0.0
+
+# Estatísticas da requisição em andamento. O objeto é mutável e compartilhado
+# com o threadpool e com o greenlet de run_sync, que herdam o contexto.
+current_request_stats: ContextVar[RequestStats | None] = ContextVar("current_request_stats", default=None)
+
+def record_query(duration: float) -> None:
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_time += duration
+
+def record_hash(duration: float) -> None:
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.hash_time += duration
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class RouteMetrics:
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS)
+        self.db_queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.hash_time = Histogram(LATENCY_BUCKETS)
+
+class RequestMetrics:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+        self.responses: dict[tuple[str, str, int], int] = {}
+
+    def observe(self, method: str, route: str, status_code: int, duration: float, stats: RequestStats) -> None:
+        with self._lock:
+            metrics = self.routes.get((method, route))
+            if metrics is None:
+                metrics = self.routes[(method, route)] = RouteMetrics()
+            key = (method, route, status_code)
+            self.responses[key] = self.responses.get(key, 0) + 1
+        metrics.latency.observe(duration)
+        metrics.db_time.observe(stats.db_time)
+        metrics.db_queries.observe(stats.db_queries)
+        metrics.hash_time.observe(stats.hash_time)
+
+    def prometheus(self) -> list[str]:
+        with self._lock:
+            routes = sorted(self.routes.items())
+            responses = sorted(self.responses.items())
+
+        lines = [
+            "# HELP http_requests_total Requisições atendidas por rota e status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status_code), count in responses:
+            lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status_code}"}} {count}')
+
+        histograms = (
+            ("http_request_duration_seconds", "latency", "Latência total da requisição."),
+            ("http_request_db_seconds", "db_time", "Tempo gasto em comandos SQL por requisição."),
+            ("http_request_db_queries", "db_queries", "Comandos SQL executados por requisição."),
+            ("http_request_hash_seconds", "hash_time", "Tempo gasto com hash de senha por requisição."),
+        )
+        for name, attribute, help_text in histograms:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), metrics in routes:
+                labels = f'method="{method}",route="{_escape(route)}"'
+                lines.extend(getattr(metrics, attribute).prometheus(name, labels))
+        return lines
+
+request_metrics = RequestMetrics()
+
+def render_prometheus(pool) -> str:
+    lines = request_metrics.prometheus()
+
+    pool_stats = pool_metrics.snapshot(pool)
+    for name in ("connects", "checkouts", "invalidations", "timeouts"):
+        lines.append(f"# TYPE db_pool_{name}_total counter")
+        lines.append(f"db_pool_{name}_total {pool_stats[name]}")
+    for name in ("size", "checked_in", "checked_out", "overflow"):
+        if name in pool_stats:
+            lines.append(f"# TYPE db_pool_{name} gauge")
+            lines.append(f"db_pool_{name} {pool_stats[name]}")
+    lines.append("# TYPE db_pool_wait_seconds histogram")
+    lines.extend(pool_metrics.wait_time.prometheus("db_pool_wait_seconds"))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,40 @@
+from contextlib import contextmanager
+from typing import Iterator
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class QueryCounter:
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+@contextmanager
+def count_queries(bind: Engine | None = None) -> Iterator[QueryCounter]:
+    # Conta os comandos enviados ao banco dentro do bloco. No modo assíncrono
+    # os eventos de cursor são emitidos pelo sync_engine, que é o `engine`
+    # exportado por app.session.
+    if bind is None:
+        from app.session import engine as bind
+
+    counter = QueryCounter()
+    event.listen(bind, "before_cursor_execute", counter._record)
+    try:
+        yield counter
+    finally:
+        event.remove(bind, "before_cursor_execute", counter._record)
+
+@contextmanager
+def assert_max_queries(limit: int, bind: Engine | None = None) -> Iterator[QueryCounter]:
+    with count_queries(bind) as counter:
+        yield counter
+    if counter.count > limit:
+        raise AssertionError(
+            f"expected at most {limit} queries, got {counter.count}:\n" + "\n".join(counter.statements)
+        )
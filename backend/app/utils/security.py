@@ -1,14 +1,27 @@
 import jwt
 import os
+import asyncio
+import hashlib
+import threading
+import time
 import datetime as datetime
+from concurrent.futures import ProcessPoolExecutor
 from passlib.context import CryptContext
 from datetime import timedelta
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.cache import LRUCache
+from app.utils.metrics import record_hash
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 SECRET_KEY = os.getenv("SECRET_KEY", "chave_secreta_super_forte")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 300
 
+# Payloads já verificados, indexados pelo SHA-256 do token e válidos até o `exp`
+token_cache = LRUCache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", 4096)))
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -18,6 +31,58 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+# Hash/verificação de senha (CPU) rodam num pool de processos dedicado, fora
+# do threadpool que atende as demais rotas. PASSWORD_HASH_WORKERS=0 usa o
+# threadpool. Acima de PASSWORD_HASH_MAX_PENDING chamadas em andamento, 503.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+
+_hash_executor: ProcessPoolExecutor | None = None
+_hash_pending = 0
+_hash_lock = threading.Lock()
+
+def _get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    with _hash_lock:
+        if _hash_executor is None:
+            _hash_executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        return _hash_executor
+
+async def _run_in_hash_pool(fn, *args):
+    global _hash_pending
+    with _hash_lock:
+        if _hash_pending >= PASSWORD_HASH_MAX_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Serviço de autenticação sobrecarregado, tente novamente",
+                headers={"Retry-After": "1"},
+            )
+        _hash_pending += 1
+
+    start = time.perf_counter()
+    try:
+        if PASSWORD_HASH_WORKERS <= 0:
+            return await run_in_threadpool(fn, *args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), fn, *args)
+    finally:
+        record_hash(time.perf_counter() - start)
+        with _hash_lock:
+            _hash_pending -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+def shutdown_hash_pool() -> None:
+    global _hash_executor
+    with _hash_lock:
+        executor, _hash_executor = _hash_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
 def create_access_token(subject: dict, minutes: int | None = None) -> str:
     expire_delta = datetime.timedelta(minutes=minutes or ACCESS_TOKEN_EXPIRE_MINUTES)
     expire_time = datetime.datetime.now(datetime.timezone.utc) + expire_delta
@@ -26,7 +91,16 @@ def create_access_token(subject: dict, minutes: int | None = None) -> str:
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def decode_token(token: str) -> dict | None:
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return dict(payload)
+
     try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except jwt.PyJWTError:
-        return None
\ No newline at end of file
+        return None
+
+    if isinstance(payload.get("exp"), (int, float)):
+        token_cache.set(key, payload, expires_at=payload["exp"])
+    return dict(payload)
\ No newline at end of file
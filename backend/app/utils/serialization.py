@@ -0,0 +1,31 @@
+from functools import lru_cache
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+@lru_cache(maxsize=None)
+def type_adapter(tp) -> TypeAdapter:
+    # Um TypeAdapter por tipo de resposta, construído uma única vez
+    return TypeAdapter(tp)
+
+def row_dicts(rows) -> list[dict]:
+    # Validar linhas com from_attributes passa pelo Row.__getattr__ a cada
+    # campo, o que custa mais que a validação em si; dicts são bem mais rápidos.
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+def json_response(data: Any, tp, status_code: int = 200, headers: dict | None = None) -> Response:
+    # Caminho rápido: valida (aceita linhas, dicts ou objetos ORM) e gera os
+    # bytes JSON no pydantic-core. Devolver um Response faz o FastAPI pular
+    # a segunda validação do response_model e o jsonable_encoder; o
+    # response_model declarado na rota continua valendo para o OpenAPI.
+    adapter = type_adapter(tp)
+    return Response(
+        adapter.dump_json(adapter.validate_python(data, from_attributes=True)),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
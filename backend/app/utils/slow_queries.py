@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from collections import deque
+
+from app.utils.metrics import current_request_stats
+
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", 100))
+SLOW_QUERY_LOG_SIZE = int(os.environ.get("SLOW_QUERY_LOG_SIZE", 100))
+SLOW_QUERY_EXPLAIN = os.environ.get("SLOW_QUERY_EXPLAIN", "false").lower() in ("1", "true", "yes", "on")
+
+# EXPLAIN sem ANALYZE não executa o comando, mas só faz sentido para leituras
+# e alterações com WHERE; INSERTs ficam de fora.
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+def _shape(value) -> str:
+    return "NULL" if value is None else type(value).__name__
+
+def parameters_shape(parameters, executemany: bool):
+    # Só os tipos, nunca os valores: o log pode conter senhas e e-mails.
+    if executemany:
+        rows = list(parameters or ())
+        return {"rows": len(rows), "row": parameters_shape(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: _shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_shape(value) for value in parameters]
+    return _shape(parameters)
+
+def _explain(conn, statement: str, parameters, executemany: bool) -> list[str] | str:
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif dialect == "postgresql":
+        prefix = "EXPLAIN "
+    else:
+        return f"EXPLAIN não suportado para {dialect}"
+
+    if executemany:
+        parameters = next(iter(parameters or ()), ())
+    # Cursor DBAPI direto: não dispara os eventos do engine nem entra no log.
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if dialect == "sqlite":
+            cursor.execute(prefix + statement, parameters or ())
+            return [" | ".join(str(column) for column in row) for row in cursor.fetchall()]
+
+        # Roda na transação da requisição: no PostgreSQL um erro a deixaria
+        # abortada, então o EXPLAIN fica num SAVEPOINT desfeito se falhar.
+        cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(prefix + statement, parameters or ())
+            rows = cursor.fetchall()
+        except Exception:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            raise
+        finally:
+            cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        return [" | ".join(str(column) for column in row) for row in rows]
+    finally:
+        cursor.close()
+
+class SlowQueryLog:
+
+    def __init__(self, threshold_ms: float, maxsize: int, explain: bool):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self._lock = threading.Lock()
+        self._entries: deque[dict] = deque(maxlen=maxsize)
+        self.total = 0
+
+    def observe(self, conn, statement: str, parameters, executemany: bool, duration: float) -> None:
+        if self.threshold < 0 or duration < self.threshold:
+            return
+
+        stats = current_request_stats.get()
+        entry = {
+            "recorded_at": time.time(),
+            "duration_ms": round(duration * 1000, 3),
+            "statement": statement,
+            "parameters": parameters_shape(parameters, executemany),
+            "route": stats.route if stats is not None else None,
+            "plan": None,
+        }
+        if self.explain and statement.lstrip().upper().startswith(EXPLAINABLE):
+            try:
+                entry["plan"] = _explain(conn, statement, parameters, executemany)
+            except Exception as e:
+                entry["plan"] = f"{type(e).__name__}: {e}"
+
+        with self._lock:
+            self._entries.append(entry)
+            self.total += 1
+
+    def entries(self) -> list[dict]:
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "explain": self.explain,
+            "total": self.total,
+            "queries": self.entries(),
+        }
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_LOG_SIZE, SLOW_QUERY_EXPLAIN)
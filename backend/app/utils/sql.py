@@ -0,0 +1,12 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+def upsert_insert(db: Session, model):
+    # INSERT com suporte a ON CONFLICT no dialeto atual (Postgres e SQLite);
+    # retorna None quando o dialeto não oferece upsert.
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    return None
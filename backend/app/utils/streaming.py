@@ -0,0 +1,35 @@
+from typing import AsyncIterator, Callable, Iterator, Sequence
+
+from app.session import AsyncSessionLocal, IS_ASYNC, SessionLocal
+
+def _iter_sync(stmt, encode: Callable[[Sequence], str], header: str, scalars: bool) -> Iterator[str]:
+    db = SessionLocal()
+    try:
+        if header:
+            yield header
+        result = db.scalars(stmt) if scalars else db.execute(stmt)
+        for rows in result.partitions():
+            yield encode(rows)
+    finally:
+        db.close()
+
+async def _iter_async(stmt, encode: Callable[[Sequence], str], header: str, scalars: bool) -> AsyncIterator[str]:
+    async with AsyncSessionLocal() as db:
+        if header:
+            yield header
+        result = await (db.stream_scalars(stmt) if scalars else db.stream(stmt))
+        async for rows in result.partitions():
+            yield encode(rows)
+
+def stream_query(
+    stmt,
+    encode: Callable[[Sequence], str],
+    header: str = "",
+    scalars: bool = False,
+) -> Iterator[str] | AsyncIterator[str]:
+    # Percorre `stmt` (que deve usar yield_per) partição por partição, numa
+    # sessão própria que vive enquanto a resposta é transmitida. `encode`
+    # roda dentro da sessão, então pode acessar relacionamentos carregados.
+    if IS_ASYNC:
+        return _iter_async(stmt, encode, header, scalars)
+    return _iter_sync(stmt, encode, header, scalars)
@@ -0,0 +1,217 @@
+"""Benchmarks da API.
+
+Semeia um banco (SQLite temporário por padrão, ou --database-url) e executa
+cenários roteirizados contra o app, em processo (ASGI) ou via HTTP contra um
+servidor já no ar, gerando um relatório JSON para comparar commits:
+
+    python -m benchmarks run --scenario browse checkout --output base.json
+    python -m benchmarks run --mode http --base-url http://127.0.0.1:8000 \\
+        --database-url postgresql://... --no-seed --output new.json
+    python -m benchmarks compare base.json new.json
+
+No modo HTTP o servidor precisa usar o mesmo banco que --database-url: ele é
+semeado (ou só lido, com --no-seed) por este processo. Consultas por
+requisição são lidas do cabeçalho Server-Timing (SERVER_TIMING=true).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+
+from benchmarks.config import SeedConfig
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def _with_session(fn, *args):
+    from app.session import AsyncSessionLocal, IS_ASYNC, SessionLocal, run_db
+
+    if IS_ASYNC:
+        async with AsyncSessionLocal() as db:
+            return await run_db(db, fn, *args)
+    db = SessionLocal()
+    try:
+        return await run_db(db, fn, *args)
+    finally:
+        db.close()
+
+async def _run_scenario(name: str, make_client, dataset, args) -> dict:
+    from benchmarks.scenarios import SCENARIOS, BenchClient, Recorder, Worker, login
+
+    scenario, needs_login = SCENARIOS[name]
+    recorder = Recorder()
+    remaining = args.iterations
+    deadline = time.perf_counter() + args.duration if args.duration else None
+
+    async with make_client() as http:
+        client = BenchClient(http, recorder)
+        workers = [Worker(index, random.Random(args.seed + index)) for index in range(args.concurrency)]
+        if needs_login:
+            # Um consumidor por worker; o login fica fora das medições
+            setup = BenchClient(http, Recorder())
+            for worker in workers:
+                worker.headers = await login(setup, f"bench{worker.index % dataset.consumers}@example.com")
+
+        async def run_worker(worker):
+            nonlocal remaining
+            while True:
+                if deadline is not None:
+                    if time.perf_counter() >= deadline:
+                        return
+                elif remaining <= 0:
+                    return
+                else:
+                    remaining -= 1
+                await scenario(client, worker, dataset)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(run_worker(worker) for worker in workers))
+        elapsed = time.perf_counter() - start
+
+    return {"elapsed_s": round(elapsed, 3), **recorder.report(elapsed)}
+
+async def run(args) -> dict:
+    import httpx
+
+    from app.main import app
+    from benchmarks.scenarios import SCENARIOS
+    from benchmarks.seed import load_dataset, seed_database
+    from app.session import engine
+
+    if args.mode == "asgi":
+        await app.router.startup()
+    try:
+        config = SeedConfig(
+            consumers=args.consumers, categories=args.categories, products=args.products,
+            carts=args.carts, items_per_cart=args.items_per_cart, seed=args.seed,
+        )
+        if not args.no_seed:
+            await _with_session(seed_database, config)
+        dataset = await _with_session(load_dataset)
+        if not dataset.consumers or not dataset.product_ids:
+            raise SystemExit("Banco sem dados de benchmark: rode sem --no-seed")
+
+        if args.mode == "asgi":
+            transport = httpx.ASGITransport(app=app)
+            make_client = lambda: httpx.AsyncClient(transport=transport, base_url="http://bench")
+        else:
+            limits = httpx.Limits(max_connections=args.concurrency)
+            make_client = lambda: httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60)
+
+        results = {}
+        for name in args.scenario or list(SCENARIOS):
+            results[name] = await _run_scenario(name, make_client, dataset, args)
+            print(f"{name}: {results[name]['throughput_rps']} req/s, p95 {results[name]['latency'].get('p95_ms')} ms", file=sys.stderr)
+    finally:
+        if args.mode == "asgi":
+            await app.router.shutdown()
+
+    return {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "mode": args.mode,
+            "database": engine.dialect.name,
+            "concurrency": args.concurrency,
+            "iterations": None if args.duration else args.iterations,
+            "duration_s": args.duration,
+            "dataset": None if args.no_seed else asdict(config),
+        },
+        "scenarios": results,
+    }
+
+COMPARED = (
+    ("throughput_rps", ("throughput_rps",)),
+    ("p50_ms", ("latency", "p50_ms")),
+    ("p95_ms", ("latency", "p95_ms")),
+    ("p99_ms", ("latency", "p99_ms")),
+    ("queries/req", ("queries_per_request",)),
+)
+
+def _lookup(report: dict, path: tuple[str, ...]):
+    for key in path:
+        report = (report or {}).get(key)
+    return report
+
+def compare(base: dict, new: dict) -> str:
+    lines = [f"base {base['meta'].get('revision')} -> new {new['meta'].get('revision')}"]
+    for name in sorted(base["scenarios"].keys() & new["scenarios"].keys()):
+        lines.append(f"\n{name}")
+        for label, path in COMPARED:
+            old_value = _lookup(base["scenarios"][name], path)
+            new_value = _lookup(new["scenarios"][name], path)
+            change = ""
+            if old_value and new_value is not None:
+                change = f"{(new_value - old_value) / old_value * 100:+.1f}%"
+            lines.append(f"  {label:<15} {old_value!s:>12} {new_value!s:>12} {change:>9}")
+    return "\n".join(lines)
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Semeia o banco e executa os cenários")
+    run_parser.add_argument("--scenario", nargs="+", choices=("browse", "add-to-cart", "checkout", "login-storm"))
+    run_parser.add_argument("--mode", choices=("asgi", "http"), default="asgi")
+    run_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    run_parser.add_argument("--database-url", help="Padrão: SQLite temporário")
+    run_parser.add_argument("--concurrency", type=int, default=10)
+    run_parser.add_argument("--iterations", type=int, default=200, help="Iterações por cenário")
+    run_parser.add_argument("--duration", type=float, help="Segundos por cenário (substitui --iterations)")
+    run_parser.add_argument("--no-seed", action="store_true", help="Reutiliza um banco já semeado")
+    run_parser.add_argument("--consumers", type=int, default=SeedConfig.consumers)
+    run_parser.add_argument("--categories", type=int, default=SeedConfig.categories)
+    run_parser.add_argument("--products", type=int, default=SeedConfig.products)
+    run_parser.add_argument("--carts", type=int, default=SeedConfig.carts)
+    run_parser.add_argument("--items-per-cart", type=int, default=SeedConfig.items_per_cart)
+    run_parser.add_argument("--seed", type=int, default=SeedConfig.seed)
+    run_parser.add_argument("--output", help="Arquivo JSON (padrão: stdout)")
+
+    compare_parser = commands.add_parser("compare", help="Compara dois relatórios JSON")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.base) as base, open(args.new) as new:
+            print(compare(json.load(base), json.load(new)))
+        return
+
+    # Definido antes de importar o app: app.session lê DATABASE_URL na importação
+    workdir = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    elif args.mode == "http":
+        parser.error("--mode http requer --database-url (o mesmo banco do servidor)")
+    else:
+        workdir = tempfile.mkdtemp(prefix="bench-api-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as target:
+            target.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
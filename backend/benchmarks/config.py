@@ -0,0 +1,12 @@
+# Sem dependências do app: importável antes de DATABASE_URL ser definido
+from dataclasses import dataclass
+
+@dataclass
+class SeedConfig:
+    consumers: int = 1_000
+    categories: int = 10
+    products: int = 10_000
+    carts: int = 100
+    items_per_cart: int = 5
+    stock: int = 1_000_000
+    seed: int = 42
@@ -0,0 +1,81 @@
+"""Latência da busca de usuário por e-mail (login/cadastro) conforme a
+tabela de consumidores cresce, com e sem o índice em lower(con_email).
+
+    python -m benchmarks.email_lookup --sizes 10000 100000 1000000 --compare-scan
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.stats import summarize
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.email_lookup")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--scan-lookups", type=int, default=20)
+    parser.add_argument("--compare-scan", action="store_true", help="Mede também sem o índice (varredura)")
+    parser.add_argument("--database-url", help="Banco síncrono a usar (padrão: SQLite temporário)")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench-email-")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{workdir}/bench.db"
+
+    # Importado só agora: app.session lê DATABASE_URL na importação
+    from sqlalchemy import insert, text
+    from app import db_models
+    from app.services.consumer_auth import get_consumer_by_email
+    from app.session import SessionLocal, engine
+
+    consumers = db_models.Consumers.__table__
+    index_name = "uq_consumers_email_lower"
+    db_models.Base.metadata.create_all(bind=engine)
+
+    def measure(db, size: int, count: int) -> list[float]:
+        samples = []
+        for _ in range(count):
+            # Caixa mista de propósito: a busca precisa normalizar
+            email = f"User{random.randrange(size)}@Example.com"
+            start = time.perf_counter()
+            consumer = get_consumer_by_email(db, email)
+            samples.append(time.perf_counter() - start)
+            assert consumer is not None, email
+            db.expunge_all()
+        return samples
+
+    results, current = [], 0
+    db = SessionLocal()
+    try:
+        for size in sorted(args.sizes):
+            while current < size:
+                batch = min(50_000, size - current)
+                db.execute(insert(consumers), [
+                    {"con_name": f"User {i}", "con_email": f"user{i}@example.com", "con_password": "x"}
+                    for i in range(current, current + batch)
+                ])
+                current += batch
+            db.commit()
+            db.execute(text("ANALYZE") if engine.dialect.name != "postgresql" else text("ANALYZE consumers"))
+            db.commit()
+
+            row = {"consumers": size, "indexed": summarize(measure(db, size, args.lookups))}
+            if args.compare_scan:
+                db.execute(text(f"DROP INDEX {index_name}"))
+                db.commit()
+                row["scan"] = summarize(measure(db, size, args.scan_lookups))
+                db.execute(text(f"CREATE UNIQUE INDEX {index_name} ON consumers (lower(con_email))"))
+                db.commit()
+            results.append(row)
+    finally:
+        db.close()
+        engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps({"database": engine.dialect.name, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
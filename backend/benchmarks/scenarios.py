@@ -0,0 +1,108 @@
+import random
+import re
+import time
+from dataclasses import dataclass, field
+
+import httpx
+
+from benchmarks.seed import BENCH_PASSWORD, WORDS, Dataset, consumer_email
+from benchmarks.stats import summarize
+
+SERVER_TIMING_DB = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+@dataclass
+class Sample:
+    latency: float
+    status: int
+    queries: int | None
+
+@dataclass
+class Recorder:
+    samples: dict[str, list[Sample]] = field(default_factory=dict)
+
+    def record(self, name: str, sample: Sample) -> None:
+        self.samples.setdefault(name, []).append(sample)
+
+    def report(self, elapsed: float) -> dict:
+        all_samples = [sample for samples in self.samples.values() for sample in samples]
+        return {
+            **_report(all_samples, elapsed),
+            "requests_by_route": {
+                name: _report(samples, elapsed) for name, samples in sorted(self.samples.items())
+            },
+        }
+
+def _report(samples: list[Sample], elapsed: float) -> dict:
+    # Consultas por requisição vêm do Server-Timing (ver RequestMetricsMiddleware)
+    queries = [sample.queries for sample in samples if sample.queries is not None]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if sample.status >= 400),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else None,
+        "latency": summarize([sample.latency for sample in samples]),
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+class BenchClient:
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder):
+        self.client = client
+        self.recorder = recorder
+
+    async def request(self, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        latency = time.perf_counter() - start
+        match = SERVER_TIMING_DB.search(response.headers.get("server-timing", ""))
+        self.recorder.record(name, Sample(latency, response.status_code, int(match.group(1)) if match else None))
+        return response
+
+@dataclass
+class Worker:
+    index: int
+    rng: random.Random
+    headers: dict = field(default_factory=dict)
+
+async def login(client: BenchClient, email: str) -> dict:
+    response = await client.request("POST /auth/login", "POST", "/auth/login", json={
+        "con_email": email, "con_password": BENCH_PASSWORD,
+    })
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def browse(client: BenchClient, worker: Worker, dataset: Dataset) -> None:
+    pages = max(1, len(dataset.product_ids) // 20)
+    await client.request("GET /products/", "GET", "/products/", params={
+        "page": worker.rng.randint(1, min(pages, 50)), "size": 20,
+    })
+    await client.request("GET /products/ (category, facets)", "GET", "/products/", params={
+        "category": worker.rng.choice(dataset.category_ids), "cursor": True, "size": 20, "facets": True,
+    })
+    await client.request("GET /products/search", "GET", "/products/search", params={"q": worker.rng.choice(WORDS)})
+    await client.request("GET /products/{product_id}", "GET", f"/products/{worker.rng.choice(dataset.product_ids)}")
+
+async def add_to_cart(client: BenchClient, worker: Worker, dataset: Dataset) -> None:
+    await client.request("POST /cart/items", "POST", "/cart/items", headers=worker.headers, json={
+        "product_id": worker.rng.choice(dataset.product_ids), "quantity": 1,
+    })
+    await client.request("GET /cart/summary", "GET", "/cart/summary", headers=worker.headers)
+
+async def checkout(client: BenchClient, worker: Worker, dataset: Dataset) -> None:
+    for product_id in worker.rng.sample(dataset.product_ids, min(3, len(dataset.product_ids))):
+        await client.request("POST /cart/items", "POST", "/cart/items", headers=worker.headers, json={
+            "product_id": product_id, "quantity": 1,
+        })
+    await client.request("POST /orders/checkout", "POST", "/orders/checkout", headers=worker.headers, json={
+        "items": [{"prod_id": dataset.product_ids[0], "quantity": 1}], "shipping_address": "Rua do Benchmark, 1",
+    })
+
+async def login_storm(client: BenchClient, worker: Worker, dataset: Dataset) -> None:
+    await login(client, consumer_email(worker.rng.randrange(dataset.consumers)))
+
+# nome -> (função, precisa de consumidor autenticado)
+SCENARIOS = {
+    "browse": (browse, False),
+    "add-to-cart": (add_to_cart, True),
+    "checkout": (checkout, True),
+    "login-storm": (login_storm, False),
+}
@@ -0,0 +1,89 @@
+import random
+from dataclasses import dataclass
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app import db_models
+from app.services import facet_service
+from app.services.cart_service import reconcile_cart_totals
+from app.services.category_service import invalidate_categories
+from app.utils.security import get_password_hash
+from benchmarks.config import SeedConfig
+
+BENCH_PASSWORD = "benchpass"
+BATCH = 10_000
+WORDS = ("camiseta", "caneca", "livro", "fone", "mochila", "teclado", "mouse", "cabo", "lampada", "garrafa")
+
+@dataclass
+class Dataset:
+    consumers: int
+    category_ids: list[int]
+    product_ids: list[int]
+
+def consumer_email(index: int) -> str:
+    return f"bench{index}@example.com"
+
+def _insert_batches(db: Session, table, rows) -> None:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            db.execute(insert(table), batch)
+            batch = []
+    if batch:
+        db.execute(insert(table), batch)
+
+def seed_database(db: Session, config: SeedConfig) -> None:
+    # Inserções em lote direto nas tabelas; o hash de senha é calculado uma
+    # vez só e compartilhado por todos os consumidores.
+    rng = random.Random(config.seed)
+    password_hash = get_password_hash(BENCH_PASSWORD)
+
+    _insert_batches(db, db_models.Category.__table__, (
+        {"name": f"BENCH_{i}", "description": f"Categoria {i}"} for i in range(config.categories)
+    ))
+    category_ids = list(db.execute(select(db_models.Category.id)).scalars())
+
+    _insert_batches(db, db_models.Consumers.__table__, (
+        {"con_name": f"Bench {i}", "con_email": consumer_email(i), "con_password": password_hash}
+        for i in range(config.consumers)
+    ))
+    _insert_batches(db, db_models.Product.__table__, (
+        {
+            "prod_name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+            "description": f"Produto de benchmark {i}",
+            "prod_price": round(rng.uniform(5, 1500), 2),
+            "stock": config.stock,
+            "prod_category_id": str(rng.choice(category_ids)),
+        }
+        for i in range(config.products)
+    ))
+    product_ids = list(db.execute(select(db_models.Product.prod_id)).scalars())
+    consumer_ids = list(db.execute(select(db_models.Consumers.con_id).order_by(db_models.Consumers.con_id)).scalars())
+
+    _insert_batches(db, db_models.Cart.__table__, (
+        {"con_id": con_id} for con_id in consumer_ids[:config.carts]
+    ))
+    cart_ids = list(db.execute(select(db_models.Cart.car_id)).scalars())
+    _insert_batches(db, db_models.CartItem.__table__, (
+        {"car_id": car_id, "product_id": product_id, "quantity": rng.randint(1, 3)}
+        for car_id in cart_ids
+        for product_id in rng.sample(product_ids, min(config.items_per_cart, len(product_ids)))
+    ))
+    reconcile_cart_totals(db)
+    db.commit()
+
+    facet_service.rebuild_facets(db)
+    invalidate_categories()
+
+def load_dataset(db: Session) -> Dataset:
+    # Lido do banco, para que um banco já semeado possa ser reutilizado
+    return Dataset(
+        consumers=db.execute(
+            select(func.count()).select_from(db_models.Consumers)
+            .where(db_models.Consumers.con_email.like("bench%@example.com"))
+        ).scalar_one(),
+        category_ids=list(db.execute(select(db_models.Category.id)).scalars()),
+        product_ids=list(db.execute(select(db_models.Product.prod_id)).scalars()),
+    )
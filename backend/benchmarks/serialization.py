@@ -0,0 +1,178 @@
+"""Custo de serialização das respostas de listagem de produtos, carrinho e
+histórico de pedidos, comparando os caminhos do FastAPI (jsonable_encoder
+sobre objetos ORM e response_model com serialize_response) com o caminho
+rápido de app.utils.serialization (linhas + TypeAdapter + dump_json):
+
+    python -m benchmarks.serialization --rows 1000 --orders 100 --repeat 50
+
+Só a serialização é medida: os dados são carregados uma vez antes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import List
+
+from benchmarks.config import SeedConfig
+from benchmarks.stats import summarize
+
+def _timed(fn, repeat: int) -> tuple[list[float], bytes]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        samples.append(time.perf_counter() - start)
+    return samples, body
+
+async def _timed_async(fn, repeat: int) -> tuple[list[float], bytes]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = await fn()
+        samples.append(time.perf_counter() - start)
+    return samples, body
+
+def _seed_orders(db, con_id: int, car_id: int, product_ids: list[int], orders: int, items: int) -> None:
+    from sqlalchemy import insert, select
+    from app import db_models
+
+    db.execute(insert(db_models.Order), [
+        {
+            "con_id": con_id, "car_id": car_id, "ord_total_amount": 10 * items,
+            "ord_status": db_models.OrderStatus.PENDING, "shipping_address": "Rua do Benchmark, 1",
+        }
+        for _ in range(orders)
+    ])
+    order_ids = db.execute(select(db_models.Order.ord_id).where(db_models.Order.con_id == con_id)).scalars()
+    db.execute(insert(db_models.OrderItem), [
+        {
+            "ord_id": ord_id, "prod_id": product_id, "prod_name": f"Produto {product_id}",
+            "unit_price": 10, "quantity": 1, "orit_subtotal": 10,
+        }
+        for ord_id in order_ids
+        for product_id in product_ids[:items]
+    ])
+    db.commit()
+
+async def run(args) -> dict:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    from app import db_models
+    from app.models.cart import CartOut
+    from app.models.order import OrderOut
+    from app.models.product import ProductOut
+    from app.services import order_service, product_service
+    from app.services.cart_service import cart_service
+    from app.session import SessionLocal
+    from app.utils.serialization import json_response, row_dicts, type_adapter
+    from benchmarks.seed import load_dataset, seed_database
+
+    db = SessionLocal()
+    try:
+        seed_database(db, SeedConfig(
+            consumers=1, products=args.rows, carts=1, items_per_cart=args.cart_items,
+        ))
+        dataset = load_dataset(db)
+        consumer = db.query(db_models.Consumers).one()
+        cart = cart_service.get_or_create_cart(db, consumer.con_id)
+        _seed_orders(db, consumer.con_id, cart.car_id, dataset.product_ids, args.orders, args.order_items)
+
+        # Entradas de cada caminho, como as rotas as recebiam antes e recebem agora
+        product_rows = db.query(*product_service.PRODUCT_COLUMNS).order_by(
+            db_models.Product.prod_name, db_models.Product.prod_id
+        ).limit(args.rows).all()
+        by_id = {product.prod_id: product for product in db.query(db_models.Product)}
+        product_objects = [by_id[row.prod_id] for row in product_rows]
+        cart = cart_service.get_or_create_cart(db, consumer.con_id)
+        orders = db.query(db_models.Order).options(order_service.ORDER_ITEMS_LOADER).filter(
+            db_models.Order.con_id == consumer.con_id
+        ).order_by(db_models.Order.ord_id.desc()).all()
+
+        def validated(tp):
+            # Carrinho e pedidos já passavam por run_db(..., out=) antes da resposta
+            adapter = type_adapter(tp)
+            return lambda data: adapter.validate_python(data, from_attributes=True)
+
+        unchanged = lambda data: data
+        payloads = (
+            # nome, tipo, (objetos ORM, preparo) antes, (entrada, preparo) no caminho rápido
+            ("products", List[ProductOut], (product_objects, unchanged), (product_rows, row_dicts)),
+            ("cart", CartOut, (cart, validated(CartOut)), (cart, validated(CartOut))),
+            ("orders", List[OrderOut], (orders, validated(List[OrderOut])), (orders, validated(List[OrderOut]))),
+        )
+
+        results = {}
+        for name, tp, (objects, prepare), (fast_input, fast_prepare) in payloads:
+            field = create_response_field(name="Response", type_=tp, mode="serialization")
+
+            async def response_model():
+                content = await serialize_response(field=field, response_content=prepare(objects))
+                return JSONResponse(content).body
+
+            def fast_path():
+                return json_response(fast_prepare(fast_input), tp).body
+
+            entry = {}
+            if prepare is unchanged:
+                # Rotas de produto sem response_model: o FastAPI caía no jsonable_encoder
+                samples, _ = _timed(lambda: JSONResponse(jsonable_encoder(objects)).body, args.repeat)
+                entry["jsonable_encoder"] = summarize(samples)
+            samples, expected = await _timed_async(response_model, args.repeat)
+            entry["response_model"] = summarize(samples)
+            samples, body = _timed(fast_path, args.repeat)
+            entry["fast_path"] = summarize(samples)
+
+            if json.loads(body) != json.loads(expected):
+                raise SystemExit(f"{name}: o caminho rápido gerou um JSON diferente do response_model")
+
+            fast = entry["fast_path"]["p50_ms"]
+            entry["speedup"] = {
+                baseline: round(entry[baseline]["p50_ms"] / fast, 2)
+                for baseline in ("jsonable_encoder", "response_model") if baseline in entry
+            }
+            entry["bytes"] = len(body)
+            results[name] = entry
+    finally:
+        db.close()
+
+    return {
+        "rows": args.rows,
+        "cart_items": args.cart_items,
+        "orders": args.orders,
+        "order_items": args.order_items,
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialization")
+    parser.add_argument("--rows", type=int, default=1_000, help="Produtos na listagem")
+    parser.add_argument("--cart-items", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=100, help="Pedidos no histórico")
+    parser.add_argument("--order-items", type=int, default=5, help="Itens por pedido")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    # Definido antes de importar o app: app.session lê DATABASE_URL na importação
+    workdir = tempfile.mkdtemp(prefix="bench-serialization-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+    try:
+        from app import db_models
+        from app.session import engine
+
+        db_models.Base.metadata.create_all(bind=engine)
+        report = asyncio.run(run(args))
+        engine.dispose()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
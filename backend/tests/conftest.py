@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+# Definido antes de importar o app: app.session lê DATABASE_URL na importação
+WORKDIR = tempfile.mkdtemp(prefix="ecommerce-tests-")
+DB_PATH = os.path.join(WORKDIR, "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["CACHE_URL"] = "memory://"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import db_models
+from app.main import app
+from app.session import Base, SessionLocal, engine
+from app.utils import dependencies
+from app.utils.cache_backend import get_cache
+
+@pytest.fixture
+def client():
+    # Banco novo a cada teste; os caches por processo guardam ids do anterior
+    engine.dispose()
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    Base.metadata.create_all(bind=engine)
+    get_cache.cache_clear()
+    dependencies._user_cache.clear()
+
+    with TestClient(app) as test_client:
+        yield test_client
+    engine.dispose()
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def make_products(db):
+    def make(count: int, stock: int = 10, price: float = 10.0) -> list[int]:
+        if not db.query(db_models.Category).first():
+            db.add(db_models.Category(name="CATEGORY_A", description="A"))
+        products = [
+            db_models.Product(
+                prod_name=f"produto {i}", description="desc", prod_price=price, stock=stock, prod_category_id="1"
+            )
+            for i in range(count)
+        ]
+        db.add_all(products)
+        db.commit()
+        return [product.prod_id for product in products]
+    return make
+
+@pytest.fixture
+def auth_headers(client):
+    email, password = "ana@example.com", "secret1"
+    response = client.post("/auth/register", json={"con_name": "Ana", "con_email": email, "con_password": password})
+    assert response.status_code == 201, response.text
+    response = client.post("/auth/login", json={"con_email": email, "con_password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
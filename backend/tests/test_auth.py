@@ -0,0 +1,24 @@
+from app import db_models
+
+def _register(client, email: str):
+    return client.post("/auth/register", json={"con_name": "Ana", "con_email": email, "con_password": "secret1"})
+
+def test_emails_normalized_on_write():
+    assert db_models.Consumers(con_email="  Ana@Example.COM ").con_email == "ana@example.com"
+    assert db_models.SellerUser(sel_email="Bia@Example.com ").sel_email == "bia@example.com"
+
+def test_register_duplicate_email_ignores_case(client):
+    assert _register(client, "User@X.com").status_code == 201
+
+    response = _register(client, "user@x.com ")
+
+    assert response.status_code == 409, response.text
+
+def test_concurrent_duplicate_register_hits_unique_index(client, monkeypatch):
+    assert _register(client, "User@X.com").status_code == 201
+    # Simula a corrida: a verificação prévia não vê o outro cadastro
+    monkeypatch.setattr("app.routes.consumer.get_consumer_by_email", lambda db, email: None)
+
+    response = _register(client, "USER@x.com")
+
+    assert response.status_code == 409, response.text
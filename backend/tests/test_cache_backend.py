@@ -0,0 +1,104 @@
+import json
+import time
+
+import fakeredis
+import pytest
+
+from app.utils.cache_backend import CacheBackend, MemoryBackend, RedisBackend
+
+LOCAL_TTL = 0.2
+
+@pytest.fixture
+def redis_pair():
+    # Dois processos da aplicação compartilhando o mesmo Redis
+    server = fakeredis.FakeServer()
+    backends = [RedisBackend(fakeredis.FakeRedis(server=server), local_ttl=LOCAL_TTL) for _ in range(2)]
+    yield backends
+    for backend in backends:
+        backend.close()
+
+def _eventually(condition, timeout: float = 3.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def test_incomplete_backend_fails_on_instantiation():
+    class NoStats(CacheBackend):
+        def get(self, key):
+            return None
+
+        def set(self, key, value, ttl=None):
+            pass
+
+        def delete(self, *keys):
+            pass
+
+    with pytest.raises(TypeError, match="stats"):
+        NoStats()
+
+def test_memory_backend_delete():
+    cache = MemoryBackend(maxsize=10)
+    cache.set("a", {"x": 1})
+    cache.set("b", [1, 2])
+
+    cache.delete("a", "missing")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == [1, 2]
+
+def test_redis_backend_shares_values(redis_pair):
+    first, second = redis_pair
+
+    first.set("product:1", {"prod_id": 1, "prod_price": 10.0})
+
+    assert second.get("product:1") == {"prod_id": 1, "prod_price": 10.0}
+    assert second.get("product:2") is None
+    assert second.stats()["hits"] == 1 and second.stats()["misses"] == 1
+    assert json.loads(first.client.get("ecommerce:product:1")) == {"prod_id": 1, "prod_price": 10.0}
+
+def test_redis_backend_ttl(redis_pair):
+    first, _ = redis_pair
+
+    first.set("short", 1, ttl=30)
+    first.set("forever", 2)
+
+    assert 0 < first.client.ttl("ecommerce:short") <= 30
+    assert first.client.ttl("ecommerce:forever") == -1
+
+def test_redis_near_cache_expires(redis_pair):
+    first, second = redis_pair
+    first.set("key", 1)
+    assert second.get("key") == 1
+
+    # Escrita direta no Redis, sem invalidação: o near-cache segue até o TTL local
+    first.client.set("ecommerce:key", json.dumps(2))
+    assert second.get("key") == 1
+    time.sleep(LOCAL_TTL + 0.05)
+    assert second.get("key") == 2
+
+def test_redis_delete_evicts_peer_near_cache(redis_pair):
+    first, second = redis_pair
+    first.set("key", 1)
+    assert second.get("key") == 1
+    assert second.stats()["local"]["size"] == 1
+
+    first.delete("key")
+
+    assert _eventually(lambda: second.stats()["local"]["size"] == 0)
+    assert second.get("key") is None
+
+def test_redis_set_evicts_peer_near_cache(redis_pair):
+    first, second = redis_pair
+    first.set("key", 1)
+    assert second.get("key") == 1
+
+    first.set("key", 2)
+
+    assert _eventually(lambda: second.stats()["local"]["size"] == 0)
+    assert second.get("key") == 2
+    # A própria gravação não é descartada pelo listener de quem gravou
+    time.sleep(0.05)
+    assert first.stats()["local"]["size"] == 1
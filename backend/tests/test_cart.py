@@ -0,0 +1,28 @@
+def _quantities(cart: dict) -> dict[int, int]:
+    return {item["product_id"]: item["quantity"] for item in cart["items"]}
+
+def test_batch_leaves_existing_items_alone(client, make_products, auth_headers):
+    first, second = make_products(2)
+    response = client.post("/cart/items", headers=auth_headers, json={"product_id": first, "quantity": 1})
+    assert response.status_code == 200, response.text
+
+    response = client.patch("/cart/", headers=auth_headers, json={
+        "operations": [{"op": "add", "product_id": second, "quantity": 1}],
+    })
+
+    assert response.status_code == 200, response.text
+    cart = response.json()
+    assert _quantities(cart) == {first: 1, second: 1}
+    assert cart["item_count"] == 2
+    assert cart["total_amount"] == 20.0
+
+def test_batch_checks_stock_of_touched_items(client, make_products, auth_headers):
+    first, second = make_products(2, stock=2)
+    client.post("/cart/items", headers=auth_headers, json={"product_id": first, "quantity": 2})
+
+    response = client.patch("/cart/", headers=auth_headers, json={
+        "operations": [{"op": "add", "product_id": second, "quantity": 3}],
+    })
+
+    assert response.status_code == 400
+    assert _quantities(client.get("/cart/", headers=auth_headers).json()) == {first: 2}
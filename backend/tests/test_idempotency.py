@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app import db_models
+from app.models.order import OrderCreate
+from app.services import idempotency_service
+
+CHECKOUT = {"items": [{"prod_id": 1, "quantity": 1}], "shipping_address": "Rua 1"}
+
+def _orders(db) -> int:
+    db.expire_all()
+    return db.query(db_models.Order).count()
+
+def _stock(db, product_id: int) -> int:
+    db.expire_all()
+    return db.get(db_models.Product, product_id).stock
+
+def test_cart_replay_includes_etag(client, make_products, auth_headers):
+    (product_id,) = make_products(1)
+    headers = {**auth_headers, "Idempotency-Key": "add-1"}
+    body = {"product_id": product_id, "quantity": 1}
+
+    first = client.post("/cart/items", headers=headers, json=body)
+    replay = client.post("/cart/items", headers=headers, json=body)
+
+    assert first.status_code == replay.status_code == 200
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.headers["ETag"] == first.headers["ETag"]
+    assert replay.json() == first.json()
+    assert first.json()["items"][0]["quantity"] == 1
+
+def test_failed_save_rolls_back_checkout(client, db, make_products, auth_headers, monkeypatch):
+    (product_id,) = make_products(1, stock=5)
+    client.post("/cart/items", headers=auth_headers, json={"product_id": product_id, "quantity": 2})
+    headers = {**auth_headers, "Idempotency-Key": "checkout-1"}
+
+    def broken_save(*args, **kwargs):
+        raise RuntimeError("queda entre a mutação e a resposta")
+
+    monkeypatch.setattr(idempotency_service, "save_response", broken_save)
+    with pytest.raises(RuntimeError):
+        client.post("/orders/checkout", headers=headers, json=CHECKOUT)
+
+    # Nada efetivado: nem pedido, nem baixa de estoque, e a chave foi liberada
+    assert _orders(db) == 0
+    assert _stock(db, product_id) == 5
+    assert db.query(db_models.IdempotencyKey).count() == 0
+
+    monkeypatch.undo()
+    first = client.post("/orders/checkout", headers=headers, json=CHECKOUT)
+    replay = client.post("/orders/checkout", headers=headers, json=CHECKOUT)
+
+    assert first.status_code == replay.status_code == 201
+    assert replay.json()["ord_id"] == first.json()["ord_id"]
+    assert _orders(db) == 1
+    assert _stock(db, product_id) == 3
+
+def test_claim_without_response_is_rerun_once(client, db, make_products, auth_headers):
+    (product_id,) = make_products(1, stock=5)
+    client.post("/cart/items", headers=auth_headers, json={"product_id": product_id, "quantity": 1})
+    consumer = db.query(db_models.Consumers).one()
+
+    # Reserva de um worker que caiu: como a resposta é gravada no mesmo
+    # COMMIT da mutação, nada dela foi efetivado.
+    record, claimed_until = idempotency_service.claim_key(
+        db, consumer.con_id, "checkout-2",
+        idempotency_service.request_fingerprint("POST /orders/checkout", OrderCreate(**CHECKOUT)),
+    )
+    assert record is None
+    db.query(db_models.IdempotencyKey).update({
+        "expires_at": claimed_until - timedelta(seconds=idempotency_service.IDEMPOTENCY_LOCK_TIMEOUT + 1),
+    })
+    db.commit()
+
+    headers = {**auth_headers, "Idempotency-Key": "checkout-2"}
+    first = client.post("/orders/checkout", headers=headers, json=CHECKOUT)
+    replay = client.post("/orders/checkout", headers=headers, json=CHECKOUT)
+
+    assert first.status_code == 201
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert _orders(db) == 1
+    assert _stock(db, product_id) == 4
+
+def test_lost_claim_does_not_execute(client, db, make_products, auth_headers):
+    make_products(1)
+    consumer = db.query(db_models.Consumers).one()
+    record, claimed_until = idempotency_service.claim_key(db, consumer.con_id, "lost", "hash")
+    assert record is None
+
+    # Outra requisição tomou a reserva (expires_at diferente)
+    with pytest.raises(HTTPException) as error:
+        idempotency_service.execute_claimed(
+            db, consumer.con_id, "lost", claimed_until - timedelta(seconds=1),
+            lambda session: pytest.fail("não deveria executar"), (), None, 200, None,
+        )
+    assert error.value.status_code == 409
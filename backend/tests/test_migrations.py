@@ -0,0 +1,49 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, text
+
+VERSIONS = Path(__file__).parents[2] / "alembic" / "versions"
+
+def _load(name: str):
+    spec = importlib.util.spec_from_file_location(name, VERSIONS / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def test_email_migration_rejects_case_duplicates(tmp_path):
+    migration = _load("0b4d7e9f3c21_email_lower_indexes")
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'migration.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE consumers (con_email VARCHAR UNIQUE)"))
+        connection.execute(text("CREATE TABLE seller_users (sel_email VARCHAR UNIQUE)"))
+        connection.execute(text("INSERT INTO consumers VALUES ('Ana@x.com'), ('ana@x.com '), ('bia@x.com')"))
+
+        with Operations.context(MigrationContext.configure(connection)):
+            with pytest.raises(RuntimeError, match=r"consumers\.con_email: .*ana@x\.com"):
+                migration.upgrade()
+
+        # Nada foi alterado antes da verificação
+        assert connection.execute(text("SELECT count(*) FROM consumers WHERE con_email = 'Ana@x.com'")).scalar() == 1
+
+def test_email_migration_normalizes_and_indexes(tmp_path):
+    migration = _load("0b4d7e9f3c21_email_lower_indexes")
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'migration.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE consumers (con_email VARCHAR UNIQUE)"))
+        connection.execute(text("CREATE TABLE seller_users (sel_email VARCHAR UNIQUE)"))
+        connection.execute(text("INSERT INTO consumers VALUES (' Ana@X.com'), ('bia@x.com')"))
+
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.upgrade()
+
+        assert connection.execute(text("SELECT con_email FROM consumers ORDER BY 1")).scalars().all() == [
+            "ana@x.com", "bia@x.com",
+        ]
+        indexes = connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars().all()
+        assert "uq_consumers_email_lower" in indexes
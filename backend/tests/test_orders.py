@@ -0,0 +1,20 @@
+from app import db_models
+
+CHECKOUT = {"items": [{"prod_id": 1, "quantity": 1}], "shipping_address": "Rua 1"}
+
+def test_checkout_total_matches_order_items(client, db, make_products, auth_headers):
+    first, second = make_products(2, price=10.0)
+    client.post("/cart/items", headers=auth_headers, json={"product_id": first, "quantity": 2})
+    client.post("/cart/items", headers=auth_headers, json={"product_id": second, "quantity": 1})
+
+    # Preço mudou sem recalcular o total desnormalizado do carrinho
+    db.query(db_models.Product).filter(db_models.Product.prod_id == second).update({"prod_price": 25.0})
+    db.commit()
+    assert client.get("/cart/summary", headers=auth_headers).json()["total_amount"] == 30.0
+
+    response = client.post("/orders/checkout", headers=auth_headers, json=CHECKOUT)
+
+    assert response.status_code == 201, response.text
+    order = response.json()
+    assert sorted(item["orit_subtotal"] for item in order["items"]) == [20.0, 25.0]
+    assert order["ord_total_amount"] == 45.0
@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.services import facet_service, product_import
+
+CSV_HEADER = b"prod_name,description,prod_price,stock,prod_category_id\n"
+
+def _bulk(client, body: bytes, fmt: str = "csv") -> dict:
+    response = client.post(f"/products/bulk?format={fmt}", content=body)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_csv_quoted_field_with_newline(client, make_products):
+    make_products(0)
+    report = _bulk(client, CSV_HEADER + b'Good one,"line1\nline2",10,5,CATEGORY_A\nOther,plain,3,1,CATEGORY_A\n')
+
+    assert report == {"processed": 2, "imported": 2, "failed": 0, "errors": []}
+    products = client.get("/products/").json()
+    assert {product["prod_name"]: product["description"] for product in products} == {
+        "Good one": "line1\nline2", "Other": "plain",
+    }
+
+def test_csv_quoted_field_across_batches(client, make_products, monkeypatch):
+    make_products(0)
+    monkeypatch.setattr("app.routes.products.BATCH_SIZE", 2)
+    body = CSV_HEADER + b'First,"a\nb\nc",10,5,CATEGORY_A\nSecond,"d\r\ne",3,1,CATEGORY_A\n'
+
+    report = _bulk(client, body)
+
+    assert report["imported"] == 2, report
+    descriptions = sorted(product["description"] for product in client.get("/products/").json())
+    assert descriptions == ["a\nb\nc", "d\r\ne"]
+
+def test_csv_unterminated_quote(client, make_products):
+    make_products(0)
+    report = _bulk(client, CSV_HEADER + b'Good one,"never closed,10,5,CATEGORY_A\n')
+
+    assert report["imported"] == 0
+    assert report["errors"] == [{"line": 2, "error": "invalid csv: unexpected end of data"}]
+
+def test_invalid_utf8_is_reported_per_line(client, make_products):
+    make_products(0)
+    body = (
+        b'{"prod_name":"Good one","prod_price":10,"stock":5,"prod_category_id":"CATEGORY_A"}\n'
+        b'{"prod_name":"Bad \xff byte","prod_price":10,"stock":5,"prod_category_id":"CATEGORY_A"}\n'
+        b'{"prod_name":"Last one","prod_price":10,"stock":5,"prod_category_id":"CATEGORY_A"}\n'
+    )
+
+    report = _bulk(client, body, fmt="ndjson")
+
+    assert report["processed"] == 3
+    assert report["imported"] == 2
+    assert [error["line"] for error in report["errors"]] == [2]
+    assert report["errors"][0]["error"].startswith("invalid utf-8")
+
+def test_aiter_lines_keeps_bytes_and_numbers_lines():
+    import asyncio
+
+    async def chunks():
+        for chunk in (b"ab\ncd", b"\n\xffe"):
+            yield chunk
+
+    async def collect():
+        return [line async for line in product_import.aiter_lines(chunks())]
+
+    assert asyncio.run(collect()) == [(1, b"ab"), (2, b"cd"), (3, b"\xffe")]
+
+def test_create_after_importing_explicit_ids(client, make_products):
+    make_products(0)
+    body = (
+        b'{"prod_id":500,"prod_name":"Imported","prod_price":10,"stock":5,"prod_category_id":"CATEGORY_A"}\n'
+        b'{"prod_name":"Without id","prod_price":10,"stock":5,"prod_category_id":"CATEGORY_A"}\n'
+    )
+    assert _bulk(client, body, fmt="ndjson")["imported"] == 2
+
+    response = client.post("/products/", json={"prod_name": "Created", "prod_price": 5, "prod_category_id": "CATEGORY_A"})
+
+    assert response.status_code == 200, response.text
+    ids = {product["prod_name"]: product["prod_id"] for product in client.get("/products/").json()}
+    assert ids == {"Imported": 500, "Without id": 501, "Created": 502}
+
+class FakePostgresSession:
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=postgresql.dialect())
+
+    def execute(self, statement, parameters=None):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+
+def test_postgres_sequence_synced_before_new_rows():
+    importer = product_import.ProductImporter("ndjson")
+    row = {"prod_name": "p", "description": "", "prod_price": 1.0, "stock": 1, "prod_category_id": "CATEGORY_A"}
+    db = FakePostgresSession()
+
+    importer._write(db, [{"line": 1, "prod_id": 7, **row}, {"line": 2, "prod_id": None, **row}])
+
+    upsert, setval, insert = db.statements
+    assert "ON CONFLICT (prod_id) DO UPDATE" in upsert
+    assert setval.startswith("SELECT setval(pg_get_serial_sequence('products', 'prod_id')")
+    assert insert.startswith("INSERT INTO products") and "ON CONFLICT" not in insert
+
+def test_interrupted_import_leaves_batches_consistent(client, db, make_products, auth_headers):
+    (product_id,) = make_products(1, stock=5, price=10.0)
+    facet_service.rebuild_facets(db)
+    client.post("/cart/items", headers=auth_headers, json={"product_id": product_id, "quantity": 2})
+    assert client.get(f"/products/{product_id}").json()["prod_price"] == 10.0
+
+    importer = product_import.ProductImporter("ndjson")
+    importer.load_categories(db)
+    row = '{"prod_id":%d,"prod_name":"Updated","prod_price":%d,"stock":%d,"prod_category_id":"CATEGORY_A"}'
+    importer.import_lines(db, [
+        (1, (row % (product_id, 200, 5)).encode()),
+        (2, (row % (product_id, 300, 0)).encode()),
+    ])
+    # Upload interrompido: finish() nunca roda
+
+    assert client.get("/cart/summary", headers=auth_headers).json()["total_amount"] == 600.0
+    assert client.get(f"/products/{product_id}").json()["prod_price"] == 300.0
+    assert facet_service.get_facets(db) == {
+        "category": {"CATEGORY_A": 1}, "price": {"250-500": 1}, "stock": {"out_of_stock": 1},
+    }
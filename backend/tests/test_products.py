@@ -0,0 +1,40 @@
+import threading
+
+import fakeredis
+
+from app.services import product_service
+from app.utils.cache_backend import RedisBackend
+
+class ThreadRecordingRedis(fakeredis.FakeRedis):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads: list[str] = []
+
+    def get(self, name):
+        self.threads.append(threading.current_thread().name)
+        return super().get(name)
+
+    def pipeline(self, *args, **kwargs):
+        self.threads.append(threading.current_thread().name)
+        return super().pipeline(*args, **kwargs)
+
+def test_get_product_reads_redis_off_the_event_loop(client, make_products, monkeypatch):
+    (product_id,) = make_products(1)
+    redis = ThreadRecordingRedis()
+    cache = RedisBackend(redis)
+    monkeypatch.setattr(product_service, "get_cache", lambda: cache)
+    loop_thread = client.portal.call(lambda: threading.current_thread().name)
+
+    try:
+        first = client.get(f"/products/{product_id}")
+        cache._local.clear()
+        second = client.get(f"/products/{product_id}")
+    finally:
+        cache.close()
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    # GET (miss), SET via pipeline e GET (acerto no Redis)
+    assert len(redis.threads) == 3
+    assert loop_thread not in redis.threads
@@ -0,0 +1,64 @@
+from app.utils.query_count import assert_max_queries, count_queries
+
+# Consultas por requisição, independentes da quantidade de pedidos/itens
+CART_QUERIES = 3
+ORDER_LIST_QUERIES = 3
+ORDER_QUERIES = 3
+
+def _fill_cart(client, headers, product_ids) -> None:
+    for product_id in product_ids:
+        response = client.post("/cart/items", headers=headers, json={"product_id": product_id, "quantity": 1})
+        assert response.status_code == 200, response.text
+
+def _checkout(client, headers, product_ids) -> int:
+    _fill_cart(client, headers, product_ids)
+    response = client.post("/orders/checkout", headers=headers, json={
+        "items": [{"prod_id": product_ids[0], "quantity": 1}], "shipping_address": "Rua 1",
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["ord_id"]
+
+def _count(client, url, headers, limit: int) -> int:
+    with assert_max_queries(limit) as counter:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+    return counter.count
+
+def test_cart_queries_do_not_grow_with_items(client, make_products, auth_headers):
+    product_ids = make_products(20)
+
+    _fill_cart(client, auth_headers, product_ids[:1])
+    one = _count(client, "/cart/", auth_headers, CART_QUERIES)
+
+    _fill_cart(client, auth_headers, product_ids[1:])
+    assert len(client.get("/cart/", headers=auth_headers).json()["items"]) == 20
+    many = _count(client, "/cart/", auth_headers, CART_QUERIES)
+
+    assert one == many
+
+def test_order_list_queries_do_not_grow_with_orders(client, make_products, auth_headers):
+    product_ids = make_products(5)
+
+    _checkout(client, auth_headers, product_ids)
+    one = _count(client, "/orders/", auth_headers, ORDER_LIST_QUERIES)
+
+    for _ in range(9):
+        _checkout(client, auth_headers, product_ids)
+    with count_queries() as counter:
+        orders = client.get("/orders/", headers=auth_headers).json()
+
+    assert len(orders) == 10
+    assert sum(len(order["items"]) for order in orders) == 50
+    assert counter.count == one <= ORDER_LIST_QUERIES
+
+def test_order_queries_do_not_grow_with_items(client, make_products, auth_headers):
+    product_ids = make_products(20)
+
+    single = _checkout(client, auth_headers, product_ids[:1])
+    many = _checkout(client, auth_headers, product_ids)
+
+    assert len(client.get(f"/orders/{many}", headers=auth_headers).json()["items"]) == 20
+    assert (
+        _count(client, f"/orders/{single}", auth_headers, ORDER_QUERIES)
+        == _count(client, f"/orders/{many}", auth_headers, ORDER_QUERIES)
+    )
@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute, serialize_response
+from fastapi.utils import create_response_field
+
+from app import db_models
+from app.main import app
+from app.services import facet_service, order_service, product_service
+from app.services.cart_service import cart_etag, cart_service
+
+Product = db_models.Product
+
+def _response_model(path: str):
+    (route,) = [route for route in app.routes if isinstance(route, APIRoute) and route.path == path and "GET" in route.methods]
+    return route.response_model
+
+def _expected(path: str, content) -> object:
+    # O que o FastAPI geraria a partir de objetos ORM com o response_model da rota
+    field = create_response_field(name="Response", type_=_response_model(path), mode="serialization")
+    return jsonable_encoder(asyncio.run(serialize_response(field=field, response_content=content)))
+
+def _get(client, url: str, headers: dict | None = None):
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/json"
+    return response
+
+@pytest.fixture
+def catalog(db, make_products):
+    product_ids = make_products(12)
+    # Preço com centavos e descrição vazia: diferenças de Decimal/None apareceriam aqui
+    db.query(Product).filter(Product.prod_id == product_ids[0]).update({"prod_price": 19.9, "description": ""})
+    db.commit()
+    facet_service.rebuild_facets(db)
+    return product_ids
+
+def _products(db, order_by, limit: int | None = None) -> list:
+    db.expire_all()
+    return db.query(Product).order_by(*order_by).limit(limit).all()
+
+def test_product_matches_response_model(client, db, catalog):
+    db.expire_all()
+    expected = _expected("/products/{product_id}", db.get(Product, catalog[0]))
+
+    # Leitura do banco e, em seguida, do cache
+    for _ in range(2):
+        assert _get(client, f"/products/{catalog[0]}").json() == expected
+
+@pytest.mark.parametrize("facets", [False, True])
+def test_product_list_matches_response_model(client, db, catalog, facets):
+    body = _get(client, f"/products/?size=5&page=2&facets={str(facets).lower()}").json()
+
+    items = _products(db, [Product.prod_name])[5:10]
+    content = {"items": items, "facets": facet_service.get_facets(db)} if facets else items
+    assert body == _expected("/products/", content)
+
+@pytest.mark.parametrize("facets", [False, True])
+def test_product_page_matches_response_model(client, db, catalog, facets):
+    flag = str(facets).lower()
+    first = _get(client, f"/products/?cursor=true&size=5&facets={flag}").json()
+    second = _get(client, f"/products/?after={first['next_cursor']}&size=5&facets={flag}").json()
+
+    ordered = _products(db, [Product.prod_name, Product.prod_id])
+    for body, items in ((first, ordered[:5]), (second, ordered[5:10])):
+        content = {"items": items, "next_cursor": product_service.encode_cursor(items[-1])}
+        if facets:
+            content["facets"] = facet_service.get_facets(db)
+        assert body == _expected("/products/", content)
+
+    last = _get(client, f"/products/?after={second['next_cursor']}&size=5").json()
+    assert last == _expected("/products/", {"items": ordered[10:], "next_cursor": None})
+
+def test_cart_matches_response_model(client, db, catalog, auth_headers):
+    for product_id in catalog[:3]:
+        client.post("/cart/items", headers=auth_headers, json={"product_id": product_id, "quantity": 2})
+
+    response = _get(client, "/cart/", headers=auth_headers)
+
+    consumer = db.query(db_models.Consumers).one()
+    db.expire_all()
+    cart = cart_service.get_or_create_cart(db, consumer.con_id)
+    assert response.json() == _expected("/cart/", cart)
+    assert response.headers["ETag"] == cart_etag(cart.car_id, cart.version)
+
+def test_orders_match_response_model(client, db, catalog, auth_headers):
+    checkout = {"items": [{"prod_id": catalog[0], "quantity": 1}], "shipping_address": "Rua 1"}
+    for size in (1, 3):
+        for product_id in catalog[:size]:
+            client.post("/cart/items", headers=auth_headers, json={"product_id": product_id, "quantity": 1})
+        assert client.post("/orders/checkout", headers=auth_headers, json=checkout).status_code == 201
+
+    body = _get(client, "/orders/", headers=auth_headers).json()
+
+    db.expire_all()
+    orders = db.query(db_models.Order).options(order_service.ORDER_ITEMS_LOADER).order_by(
+        db_models.Order.ord_id.desc()
+    ).all()
+    assert len(body) == 2
+    assert body == _expected("/orders/", orders)
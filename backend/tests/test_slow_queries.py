@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import func, select
+
+from app import db_models
+from app.utils.slow_queries import SlowQueryLog
+
+class FakeCursor:
+
+    def __init__(self, statements: list[str], fail_explain: bool):
+        self.statements = statements
+        self.fail_explain = fail_explain
+
+    def execute(self, statement, parameters=()):
+        self.statements.append(statement)
+        if statement.startswith("EXPLAIN") and self.fail_explain:
+            raise RuntimeError("could not determine data type of parameter $1")
+
+    def fetchall(self):
+        return [("Seq Scan on products",)]
+
+    def close(self):
+        pass
+
+def _postgres_connection(statements: list[str], fail_explain: bool = False):
+    cursor = FakeCursor(statements, fail_explain)
+    return SimpleNamespace(
+        dialect=SimpleNamespace(name="postgresql"),
+        connection=SimpleNamespace(dbapi_connection=SimpleNamespace(cursor=lambda: cursor)),
+    )
+
+@pytest.mark.parametrize("fail_explain", [False, True])
+def test_postgres_explain_runs_inside_savepoint(fail_explain):
+    statements: list[str] = []
+    log = SlowQueryLog(threshold_ms=0, maxsize=10, explain=True)
+
+    log.observe(_postgres_connection(statements, fail_explain), "SELECT * FROM products", {}, False, 1.0)
+
+    entry = log.entries()[0]
+    if fail_explain:
+        # Erro desfeito no SAVEPOINT: a transação da requisição continua utilizável
+        assert statements == [
+            "SAVEPOINT slow_query_explain",
+            "EXPLAIN SELECT * FROM products",
+            "ROLLBACK TO SAVEPOINT slow_query_explain",
+            "RELEASE SAVEPOINT slow_query_explain",
+        ]
+        assert entry["plan"].startswith("RuntimeError")
+    else:
+        assert statements == [
+            "SAVEPOINT slow_query_explain",
+            "EXPLAIN SELECT * FROM products",
+            "RELEASE SAVEPOINT slow_query_explain",
+        ]
+        assert entry["plan"] == ["Seq Scan on products"]
+
+def test_sqlite_explain_keeps_transaction_usable(client, db, make_products):
+    make_products(1)
+    log = SlowQueryLog(threshold_ms=0, maxsize=10, explain=True)
+    connection = db.connection()
+
+    log.observe(connection, "SELECT * FROM no_such_table", (), False, 1.0)
+    log.observe(connection, "SELECT prod_id FROM products WHERE prod_id = ?", (1,), False, 1.0)
+
+    failed, planned = reversed(log.entries())
+    assert "no such table" in failed["plan"]
+    assert any("products" in line for line in planned["plan"])
+    assert db.execute(select(func.count()).select_from(db_models.Product)).scalar_one() == 1